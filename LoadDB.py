@@ -1,8 +1,11 @@
 import pandas as pd
 import sqlite3
 
+from config import DB_FILE, DB_TABLE, SCORES_TABLE, DB_SCORE_BATCH_SIZE, FEATURE_COLUMNS
+from scoring import load_plan
+
 class CSVToSQLite:
-    def __init__(self, db_name='Churn.db'):
+    def __init__(self, db_name=DB_FILE):
         self.db_name = db_name
 
     def upload_csv(self, file_path):
@@ -24,6 +27,61 @@ class CSVToSQLite:
         except Exception as e:
             print(f"An error occurred while saving to the database: {e}")
 
+    def connect(self, plan=None):
+        """Open the database with a churn_proba(...) SQL function registered
+
+        churn_proba takes the nine feature columns in FEATURE_COLUMNS order
+        and returns the probability of leaving, e.g.
+        SELECT * FROM Churn ORDER BY churn_proba(satisfaction_level, ..., salary) DESC
+        """
+        plan = plan or load_plan()
+        conn = sqlite3.connect(self.db_name)
+
+        def churn_proba(*row):
+            return plan.score_one(row)
+
+        conn.create_function('churn_proba', len(FEATURE_COLUMNS), churn_proba,
+                             deterministic=True)
+        return conn
+
+    def materialize_scores(self, table_name=DB_TABLE, scores_table=SCORES_TABLE,
+                           batch_size=DB_SCORE_BATCH_SIZE, plan=None):
+        """Score every row of table_name into scores_table, one transaction per batch
+
+        scores_table is keyed by the source table's rowid, so it can be
+        joined back with `JOIN ChurnScores s ON s.employee_rowid = Churn.rowid`.
+        Returns the number of rows scored.
+        """
+        plan = plan or load_plan()
+        columns = ', '.join(f'"{col}"' for col in FEATURE_COLUMNS)
+        conn = sqlite3.connect(self.db_name)
+        try:
+            with conn:
+                conn.execute(f'DROP TABLE IF EXISTS "{scores_table}"')
+                conn.execute(f'CREATE TABLE "{scores_table}" ('
+                             'employee_rowid INTEGER PRIMARY KEY, '
+                             'leave_probability REAL, model_version TEXT)')
+
+            last_rowid, total = -1, 0
+            while True:
+                batch = pd.read_sql_query(
+                    f'SELECT rowid AS employee_rowid, {columns} FROM "{table_name}" '
+                    'WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    conn, params=(last_rowid, batch_size))
+                if batch.empty:
+                    break
+                leave = plan.score(batch)[:, 1]
+                with conn:
+                    conn.executemany(
+                        f'INSERT INTO "{scores_table}" VALUES (?, ?, ?)',
+                        zip(batch['employee_rowid'].tolist(), leave.tolist(),
+                            [plan.version] * len(batch)))
+                last_rowid = int(batch['employee_rowid'].iloc[-1])
+                total += len(batch)
+        finally:
+            conn.close()
+        return total
+
 if __name__ == "__main__":
     csv_to_sqlite = CSVToSQLite()
     file_path = "/Users/chandanmahato/Downloads/HR_comma_sep.csv"
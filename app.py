@@ -1,46 +1,34 @@
-import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 import streamlit as st
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from config import DATA_FILE, TRAIN_CACHE_DIR
+from scoring import ScoringPlan
+from train import file_hash, train_artifacts
 
 # Suppress deprecation warning
 import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="matplotlib")
 
-# Load data
-data = pd.read_csv('HR_comma_sep.csv')  # Update with your dataset filename
-
-# Define features (X) and target (y)
-X = data[['satisfaction_level', 'last_evaluation', 'number_project', 'average_montly_hours',
-          'time_spend_company', 'Work_accident', 'promotion_last_5years', 'Department', 'salary']]
-y = data['left']
-
-# Encode categorical variables
-label_encoders = {}
-for col in ['Department', 'salary']:
-    label_encoders[col] = LabelEncoder()
-    X.loc[:, col] = label_encoders[col].fit_transform(X.loc[:, col])
+# Streamlit re-executes this script on every widget interaction. Only the
+# data file is hashed per rerun; the data and the model are cached per
+# content hash, so the model is trained only when the data changes. Training
+# goes through the train.py stage cache and never overwrites the .pkl files.
+@st.cache_data
+def load_data(data_hash):
+    return pd.read_csv(DATA_FILE)
 
-# Split data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42)
+@st.cache_resource
+def load_model(data_hash):
+    model, scaler, label_encoders = train_artifacts(DATA_FILE, cache_dir=TRAIN_CACHE_DIR,
+                                                    data_hash=data_hash, log=lambda msg: None)
+    return ScoringPlan.from_artifacts(model, scaler, label_encoders)
 
-# Standardize features
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# Train Logistic Regression Classifier
-logistic_classifier = LogisticRegression(random_state=42)
-logistic_classifier.fit(X_train_scaled, y_train)
-
-# Save model and preprocessing objects
-joblib.dump(logistic_classifier, 'logistic_regression_model.pkl')
+data_hash = file_hash(DATA_FILE)
+data = load_data(data_hash)
+plan = load_model(data_hash)
 
 # Initialize session state for login
 if 'logged_in' not in st.session_state:
@@ -98,14 +86,8 @@ else:
 
     # Make prediction
     if st.button('Predict'):
-        # Preprocess input data
-        for col in ['Department', 'salary']:
-            input_data.loc[:, col] = label_encoders[col].transform(
-                input_data.loc[:, col])
-        scaled_input_data = scaler.transform(input_data)
-
         # Predict outcome probabilities
-        proba = logistic_classifier.predict_proba(scaled_input_data)
+        proba = plan.score(input_data)
         st.markdown(f'<h1 style="color:green;">Probability of employee staying: {np.round(proba[0][0], 2)}</h1>',
                     unsafe_allow_html=True)
         st.markdown(f'<h1 style="color:red;">Probability of employee leaving: {np.round(proba[0][1], 2)}</h1>',
@@ -4,7 +4,13 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import joblib
+from scoring import load_plan, PredictionCache
+from contributions import (data_version, employee_contributions, population_contributions,
+                           department_drivers)
+from sensitivity import sensitivity_sweep
+from ranking import RiskRanking
+from risk_bands import population_bands, band_of
+from config import FEATURE_LABELS, FEATURE_RANGES
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -109,16 +115,38 @@ def load_data():
         st.error("Error loading data file. Please ensure 'HR_comma_sep.csv' is in the current directory.")
         return None
 
+# Hashed once per loaded dataset; the population caches are keyed by it
+@st.cache_data
+def load_data_version():
+    data = load_data()
+    return None if data is None else data_version(data)
+
 @st.cache_resource
 def load_models():
     try:
-        model = joblib.load('logistic_regression_model.pkl')
-        scaler = joblib.load('scaler.pkl')
-        label_encoders = joblib.load('label_encoders.pkl')
-        return model, scaler, label_encoders
+        return load_plan()
     except:
         st.error("Error loading models. Please ensure model files are present.")
-        return None, None, None
+        return None
+
+@st.cache_resource
+def load_prediction_cache():
+    plan = load_models()
+    if plan is None:
+        return None
+    cache = PredictionCache(plan)
+    data = load_data()
+    if data is not None:
+        cache.warm_up(data)
+    return cache
+
+@st.cache_resource
+def load_risk_ranking():
+    plan = load_models()
+    data = load_data()
+    if plan is None or data is None:
+        return None
+    return RiskRanking(plan, data)
 
 # Login function
 def login(username, password):
@@ -166,9 +194,9 @@ def main():
     
     # Load data and models
     data = load_data()
-    model, scaler, label_encoders = load_models()
+    prediction_cache = load_prediction_cache()
     
-    if data is None or model is None:
+    if data is None or prediction_cache is None:
         st.error("Failed to load data or models. Please check your files.")
         return
 
@@ -180,15 +208,15 @@ def main():
     )
 
     if page == "🏠 Dashboard":
-        show_dashboard(data)
+        show_dashboard(data, prediction_cache.plan, load_risk_ranking(), load_data_version())
     elif page == "🔮 Prediction":
-        show_prediction_page(data, model, scaler, label_encoders)
+        show_prediction_page(data, prediction_cache)
     elif page == "📊 Analytics":
         show_analytics_page(data)
     elif page == "📈 Insights":
-        show_insights_page(data)
+        show_insights_page(data, prediction_cache.plan, load_data_version())
 
-def show_dashboard(data):
+def show_dashboard(data, plan, risk_ranking, version):
     st.markdown("## 📊 Dashboard Overview")
     
     # Key metrics
@@ -244,7 +272,57 @@ def show_dashboard(data):
                     title='Satisfaction Level by Churn Status')
         st.plotly_chart(fig, use_container_width=True)
 
-def show_prediction_page(data, model, scaler, label_encoders):
+    show_risk_bands(data, plan, version)
+
+    if risk_ranking is not None:
+        show_risk_ranking(data, risk_ranking)
+
+def show_risk_bands(data, plan, version):
+    st.subheader("🌡️ Population Risk Bands")
+    counts, histogram = population_bands(data, plan, df_version=version)
+    band_labels = {'high_retention': '🎉 High Retention',
+                   'moderate_risk': '⚠️ Moderate Risk',
+                   'high_risk': '🚨 High Risk'}
+    band_colors = {'high_retention': '#38ef7d', 'moderate_risk': '#f7b731',
+                   'high_risk': '#ff6b6b'}
+
+    for col, band in zip(st.columns(3), ['high_retention', 'moderate_risk', 'high_risk']):
+        with col:
+            st.metric(band_labels[band], f"{counts[band]:,}",
+                      f"{counts[band] / len(data):.1%} of employees", delta_color="off")
+
+    fig = px.bar(histogram, x='bin_start', y='employees', color='band',
+                 color_discrete_map=band_colors,
+                 labels={'bin_start': 'Leave Probability', 'employees': 'Employees'},
+                 title='Risk Score Distribution')
+    fig.update_traces(width=histogram['bin_end'].iloc[0] - histogram['bin_start'].iloc[0],
+                      offset=0)
+    fig.for_each_trace(lambda trace: trace.update(name=band_labels[trace.name]))
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_risk_ranking(data, risk_ranking):
+    st.subheader("🚨 Highest-Risk Employees")
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        scope = st.selectbox("Rank within", ["Company", "Department", "Salary"])
+    by = {'Company': None, 'Department': 'Department', 'Salary': 'salary'}[scope]
+    value = None
+    with col2:
+        if by is not None:
+            value = st.selectbox(f"{scope}", risk_ranking.groups(by))
+    with col3:
+        count = st.slider("Employees shown", 5, risk_ranking.k, min(20, risk_ranking.k))
+
+    top = risk_ranking.top(by, value).head(count)
+    table = data.iloc[top['row']][['Department', 'salary', 'satisfaction_level',
+                                   'last_evaluation', 'number_project',
+                                   'average_montly_hours', 'time_spend_company']]
+    table.insert(0, 'Leave Probability', top['leave_probability'].to_numpy())
+    st.dataframe(table.style.format({'Leave Probability': '{:.1%}'}),
+                 use_container_width=True)
+
+def show_prediction_page(data, prediction_cache):
     st.markdown("## 🔮 Employee Churn Prediction")
     
     st.markdown("""
@@ -255,18 +333,30 @@ def show_prediction_page(data, model, scaler, label_encoders):
     </div>
     """, unsafe_allow_html=True)
     
+    live_mode = st.toggle('⚡ Live prediction (update as you drag)', value=False)
+    prediction_panel(prediction_cache, live_mode)
+
+# Sliders share FEATURE_RANGES with the sensitivity sweep, so every slider
+# position is a point on its curve
+def feature_slider(label, col):
+    low, high, default, step = FEATURE_RANGES[col]
+    return st.slider(label, low, high, default, step)
+
+# A fragment: in live mode each widget change reruns only this panel
+@st.fragment
+def prediction_panel(prediction_cache, live_mode):
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("📊 Employee Metrics")
-        satisfaction_level = st.slider('Satisfaction Level', 0.0, 1.0, 0.5, 0.01)
-        last_evaluation = st.slider('Last Evaluation Score', 0.0, 1.0, 0.5, 0.01)
-        number_project = st.slider('Number of Projects', 1, 10, 5)
-        average_monthly_hours = st.slider('Average Monthly Hours', 80, 400, 200)
+        satisfaction_level = feature_slider('Satisfaction Level', 'satisfaction_level')
+        last_evaluation = feature_slider('Last Evaluation Score', 'last_evaluation')
+        number_project = feature_slider('Number of Projects', 'number_project')
+        average_monthly_hours = feature_slider('Average Monthly Hours', 'average_montly_hours')
         
     with col2:
         st.subheader("🏢 Organizational Factors")
-        time_spend_company = st.slider('Years at Company', 1, 10, 5)
+        time_spend_company = feature_slider('Years at Company', 'time_spend_company')
         work_accident = st.selectbox('Work Accident', ['No', 'Yes'])
         promotion_last_5years = st.selectbox('Promotion in Last 5 Years', ['No', 'Yes'])
         department = st.selectbox('Department', [
@@ -275,73 +365,101 @@ def show_prediction_page(data, model, scaler, label_encoders):
         ])
         salary = st.selectbox('Salary Level', ['low', 'medium', 'high'])
     
-    # Prediction button
-    if st.button('🔮 Predict Churn Probability', use_container_width=True):
-        # Prepare input data with correct column names (matching the trained model)
-        input_data = pd.DataFrame({
-            'satisfaction': [satisfaction_level],
-            'evaluation': [last_evaluation],
-            'projectCount': [number_project],
-            'averageMonthlyHours': [average_monthly_hours],
-            'yearsAtCompany': [time_spend_company],
-            'workAccident': [1 if work_accident == 'Yes' else 0],
-            'promotion': [1 if promotion_last_5years == 'Yes' else 0],
-            'Department': [department],
-            'salary': [salary]
-        })
-        
-        # Preprocess input data
-        for col in ['Department', 'salary']:
-            input_data.loc[:, col] = label_encoders[col].transform(input_data.loc[:, col])
-        
-        scaled_input_data = scaler.transform(input_data)
+    # In live mode every widget change re-scores; otherwise wait for the button
+    if live_mode or st.button('🔮 Predict Churn Probability', use_container_width=True):
+        # Prepare input data with the raw HR_comma_sep.csv column names
+        input_data = {
+            'satisfaction_level': satisfaction_level,
+            'last_evaluation': last_evaluation,
+            'number_project': number_project,
+            'average_montly_hours': average_monthly_hours,
+            'time_spend_company': time_spend_company,
+            'Work_accident': 1 if work_accident == 'Yes' else 0,
+            'promotion_last_5years': 1 if promotion_last_5years == 'Yes' else 0,
+            'Department': department,
+            'salary': salary
+        }
         
         # Make prediction
-        proba = model.predict_proba(scaled_input_data)
-        stay_prob = proba[0][0]
-        leave_prob = proba[0][1]
-        
-        # Display results
-        col1, col2 = st.columns(2)
+        stay_prob, leave_prob = prediction_cache.predict(input_data)
+        contributions = employee_contributions(prediction_cache.plan, input_data)
+        show_prediction_result(stay_prob, leave_prob, contributions)
         
-        with col1:
-            if stay_prob > 0.7:
-                st.markdown(f"""
-                <div class="prediction-card">
-                    <h2>🎉 High Retention Probability</h2>
-                    <h1>{stay_prob:.1%}</h1>
-                    <p>This employee is likely to stay with the company.</p>
-                </div>
-                """, unsafe_allow_html=True)
-            elif stay_prob > 0.5:
-                st.markdown(f"""
-                <div class="prediction-card">
-                    <h2>⚠️ Moderate Retention Risk</h2>
-                    <h1>{stay_prob:.1%}</h1>
-                    <p>Consider retention strategies for this employee.</p>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div class="warning-card">
-                    <h2>🚨 High Churn Risk</h2>
-                    <h1>{leave_prob:.1%}</h1>
-                    <p>Immediate attention required for retention.</p>
-                </div>
-                """, unsafe_allow_html=True)
-        
-        with col2:
-            # Probability chart
-            fig = go.Figure(data=[
-                go.Bar(x=['Stay', 'Leave'], y=[stay_prob, leave_prob],
-                      marker_color=['#38ef7d', '#ff6b6b'])
-            ])
-            fig.update_layout(
-                title="Prediction Probabilities",
-                yaxis_title="Probability",
-                showlegend=False
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        with st.expander("📉 Sensitivity: how risk changes along each slider"):
+            show_sensitivity_curves(sensitivity_sweep(prediction_cache.plan, input_data),
+                                    input_data, leave_prob)
+
+def show_prediction_result(stay_prob, leave_prob, contributions):
+    col1, col2 = st.columns(2)
+    
+    band = band_of(stay_prob)
+    with col1:
+        if band == 'high_retention':
+            st.markdown(f"""
+            <div class="prediction-card">
+                <h2>🎉 High Retention Probability</h2>
+                <h1>{stay_prob:.1%}</h1>
+                <p>This employee is likely to stay with the company.</p>
+            </div>
+            """, unsafe_allow_html=True)
+        elif band == 'moderate_risk':
+            st.markdown(f"""
+            <div class="prediction-card">
+                <h2>⚠️ Moderate Retention Risk</h2>
+                <h1>{stay_prob:.1%}</h1>
+                <p>Consider retention strategies for this employee.</p>
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            st.markdown(f"""
+            <div class="warning-card">
+                <h2>🚨 High Churn Risk</h2>
+                <h1>{leave_prob:.1%}</h1>
+                <p>Immediate attention required for retention.</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    with col2:
+        # Probability chart
+        fig = go.Figure(data=[
+            go.Bar(x=['Stay', 'Leave'], y=[stay_prob, leave_prob],
+                  marker_color=['#38ef7d', '#ff6b6b'])
+        ])
+        fig.update_layout(
+            title="Prediction Probabilities",
+            yaxis_title="Probability",
+            showlegend=False
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # What drives this prediction (log-odds relative to an average employee)
+    contributions = contributions.rename(FEATURE_LABELS).sort_values()
+    fig = go.Figure(data=[
+        go.Bar(x=contributions.values, y=contributions.index, orientation='h',
+               marker_color=['#ff6b6b' if v > 0 else '#38ef7d' for v in contributions.values])
+    ])
+    fig.update_layout(
+        title="What Drives This Prediction",
+        xaxis_title="Contribution to churn risk (log-odds)",
+        showlegend=False
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_sensitivity_curves(curves, input_data, leave_prob):
+    fig = make_subplots(rows=2, cols=3,
+                        subplot_titles=[FEATURE_LABELS[col] for col in curves])
+    for i, (col, curve) in enumerate(curves.items()):
+        row, column = i // 3 + 1, i % 3 + 1
+        fig.add_trace(go.Scatter(x=curve['value'], y=curve['leave_probability'],
+                                 mode='lines', line_color='#764ba2'),
+                      row=row, col=column)
+        # Mark the current profile at its own prediction, not the nearest grid point
+        fig.add_trace(go.Scatter(x=[input_data[col]], y=[leave_prob],
+                                 mode='markers', marker=dict(color='#ff6b6b', size=10)),
+                      row=row, col=column)
+        fig.update_yaxes(range=[0, 1], row=row, col=column)
+    fig.update_layout(height=550, showlegend=False, title="Leave Probability by Slider Value")
+    st.plotly_chart(fig, use_container_width=True)
 
 def show_analytics_page(data):
     st.markdown("## 📊 Data Analytics")
@@ -386,7 +504,7 @@ def show_analytics_page(data):
                  color_continuous_scale='RdYlGn_r')
     st.plotly_chart(fig, use_container_width=True)
 
-def show_insights_page(data):
+def show_insights_page(data, plan, version):
     st.markdown("## 📈 Key Insights")
     
     # Correlation analysis
@@ -405,17 +523,19 @@ def show_insights_page(data):
     # Key insights
     st.subheader("💡 Key Findings")
     
+    # Model drivers: mean contribution among employees who left
+    contributions = population_contributions(data, plan, version)
+    leaver_drivers = contributions[data['left'] == 1].mean().nlargest(4)
+    factors = ''.join(f"<li>{FEATURE_LABELS[col]}</li>" for col in leaver_drivers.index)
+    
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
+        st.markdown(f"""
         <div class="info-card">
             <h3>🎯 Top Churn Factors</h3>
             <ul>
-                <li>Low satisfaction level</li>
-                <li>High evaluation with low satisfaction</li>
-                <li>Long working hours</li>
-                <li>No promotions</li>
+                {factors}
             </ul>
         </div>
         """, unsafe_allow_html=True)
@@ -433,6 +553,12 @@ def show_insights_page(data):
         </div>
         """, unsafe_allow_html=True)
     
+    # Department drivers
+    st.subheader("🏢 Top Churn Drivers by Department")
+    drivers = department_drivers(data, contributions)
+    driver_columns = [col for col in drivers.columns if col.startswith('driver_')]
+    st.dataframe(drivers[driver_columns].replace(FEATURE_LABELS), use_container_width=True)
+    
     # Time series analysis
     st.subheader("⏰ Time-based Patterns")
     
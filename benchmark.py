@@ -0,0 +1,138 @@
+"""
+Benchmarks for Employee Churn Prediction scoring
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_FILE
+from parallel import ParallelScorer
+from ranking import RiskRanking
+from scoring import compile_plan, encode_features, load_artifacts, score_batch
+from search import search
+from tree_model import TreeEnsemblePlan, train_trees
+
+
+def make_population(n_rows, seed=42):
+    """Resample HR_comma_sep.csv up to n_rows employees"""
+    data = pd.read_csv(DATA_FILE)
+    idx = np.random.default_rng(seed).integers(0, len(data), n_rows)
+    return data.iloc[idx].reset_index(drop=True)
+
+
+def time_best(func, repeat=3):
+    """Return the best wall-clock time of func over repeat runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_score_batch(n_rows, repeat=3):
+    """Time score_batch over a synthetic population of n_rows"""
+    model, scaler, label_encoders = load_artifacts()
+    population = make_population(n_rows)
+    seconds = time_best(
+        lambda: score_batch(population, model, scaler, label_encoders), repeat)
+    print(f"score_batch  {n_rows:>12,} rows  {seconds:8.3f}s  "
+          f"{n_rows / seconds:>14,.0f} rows/s")
+    return seconds
+
+
+def bench_parallel(n_rows, max_workers=None, repeat=3):
+    """Report ParallelScorer's scaling curve from 1 to max_workers cores"""
+    max_workers = max_workers or os.cpu_count()
+    plan = compile_plan()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'population.csv')
+        make_population(n_rows).to_csv(path, index=False)
+
+        baseline = None
+        for workers in range(1, max_workers + 1):
+            with ParallelScorer(plan, workers) as scorer:
+                scorer.score_file(path)
+                seconds = time_best(lambda: scorer.score_file(path), repeat)
+            baseline = baseline or seconds
+            print(f"parallel  {workers:>3} workers  {n_rows:>12,} rows  {seconds:8.3f}s  "
+                  f"{n_rows / seconds:>14,.0f} rows/s  x{baseline / seconds:.2f}")
+
+
+def bench_ranking(n_rows, changed_fraction=0.001, repeat=3):
+    """Time building top-K rankings and an incremental update of a few rows"""
+    plan = compile_plan()
+    population = make_population(n_rows)
+    build = time_best(lambda: RiskRanking(plan, population), repeat)
+
+    ranking = RiskRanking(plan, population)
+    n_changed = max(1, int(n_rows * changed_fraction))
+    rows = np.random.default_rng(0).choice(n_rows, n_changed, replace=False)
+    changed = make_population(n_changed, seed=1)
+    update = time_best(lambda: ranking.update(rows, changed), repeat)
+    print(f"ranking  {n_rows:>12,} rows  build {build:8.3f}s  "
+          f"update {n_changed:,} rows {update:8.3f}s")
+
+
+def bench_trees(n_rows, repeat=3):
+    """Time the NumPy tree predictor against scikit-learn's predict_proba
+
+    Both score the same already-encoded matrix with the same boosted trees.
+    """
+    with tempfile.TemporaryDirectory() as cache_dir:
+        model, label_encoders, _ = train_trees(cache_dir=cache_dir, log=lambda msg: None)
+    plan = TreeEnsemblePlan.from_model(model, label_encoders)
+    X = encode_features(make_population(n_rows), plan.category_tables)
+    sklearn_seconds = time_best(lambda: model.predict_proba(X), repeat)
+    numpy_seconds = time_best(lambda: plan.predict_proba(X), repeat)
+    print(f"trees  {n_rows:>12,} rows  sklearn {sklearn_seconds:8.4f}s  "
+          f"numpy {numpy_seconds:8.4f}s  x{sklearn_seconds / numpy_seconds:.2f}")
+
+
+def bench_search(max_workers=None, repeat=1):
+    """Report the hyperparameter search's scaling curve from 1 to max_workers cores"""
+    max_workers = max_workers or os.cpu_count()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # The first run fills the fold cache, so every timed run only fits
+        search(cache_dir=cache_dir, workers=1, log=lambda msg: None)
+        baseline = None
+        for workers in range(1, max_workers + 1):
+            seconds = time_best(lambda: search(cache_dir=cache_dir, workers=workers,
+                                               log=lambda msg: None), repeat)
+            baseline = baseline or seconds
+            print(f"search  {workers:>3} workers  {seconds:8.3f}s  x{baseline / seconds:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark churn scoring")
+    parser.add_argument('suite', nargs='?', choices=['batch', 'parallel', 'ranking', 'search', 'trees'],
+                        default='batch')
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Largest worker count for the parallel and search suites")
+    args = parser.parse_args()
+
+    if args.suite == 'search':
+        bench_search(args.workers, args.repeat)
+        return
+
+    for n_rows in args.rows:
+        if args.suite == 'batch':
+            bench_score_batch(n_rows, args.repeat)
+        elif args.suite == 'trees':
+            bench_trees(n_rows, args.repeat)
+        elif args.suite == 'parallel':
+            bench_parallel(n_rows, args.workers, args.repeat)
+        else:
+            bench_ranking(n_rows, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Model comparison harness for Employee Churn Prediction
+
+Trains each candidate in MODEL_CANDIDATES on the train.py training split of
+HR_comma_sep.csv and exports it as a model bundle. Each candidate is then
+measured the way it is served, loaded from that bundle:
+
+    roc_auc          on the train.py test split
+    p50/p99 latency  of single-row plan.score_one() calls
+    rows/s           of plan.score() over a resampled batch, encoding included
+    bundle size      bytes on disk
+    base RSS         of a fresh process once pandas is imported and the batch
+                     is loaded, the same for every candidate
+    model peak       peak RSS above that base while the bundle is loaded and
+                     scored; each candidate runs in its own process, so
+                     candidates do not inflate each other's numbers. It
+                     needs Linux's resettable peak watermark and is NaN
+                     elsewhere
+
+Usage:
+    python compare_models.py                               # every candidate
+    python compare_models.py --models logistic gbm --rows 500000 --csv models.csv
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import (DATA_FILE, FEATURE_COLUMNS, TARGET_COLUMN, TRAIN_CACHE_DIR,
+                    MODEL_CANDIDATES, COMPARE_LATENCY_CALLS, COMPARE_BATCH_ROWS)
+
+
+def train_candidate(name, spec, path, cache_dir=TRAIN_CACHE_DIR, random_state=42):
+    """Train one candidate on the train.py training split and write its bundle"""
+    from train import StageCache, build_stages
+
+    log = lambda msg: None
+    kind, params = spec['kind'], spec.get('params', {})
+    if kind == 'logistic':
+        from model_bundle import export_bundle
+        from train import train_artifacts
+        model, scaler, label_encoders = train_artifacts(params=params, cache_dir=cache_dir,
+                                                        random_state=random_state, log=log)
+        return export_bundle(model, scaler, label_encoders, path)
+    if kind == 'trees':
+        from tree_model import export_tree_bundle, train_trees
+        model, label_encoders, _ = train_trees(params=params, cache_dir=cache_dir,
+                                               random_state=random_state, log=log)
+        return export_tree_bundle(model, label_encoders, path)
+    if kind == 'sgd':
+        from model_bundle import export_bundle
+        from train_sgd import train_out_of_core
+        stages = build_stages(DATA_FILE, 0.2, random_state, StageCache(cache_dir, log))
+        train_rows = stages['split'][1]()[0]
+        train_df = stages['load'][1]().iloc[train_rows]
+        # The whole train.py training split is the training set here, so
+        # every candidate is scored on the same held-out rows
+        model, scaler, label_encoders, _ = train_out_of_core(
+            lambda: iter([train_df]), test_fraction=0.0, seed=random_state, log=log, **params)
+        return export_bundle(model, scaler, label_encoders, path)
+    raise ValueError(f"Unknown candidate kind '{kind}' for '{name}'")
+
+
+def test_split(random_state=42, cache_dir=TRAIN_CACHE_DIR):
+    """Return the train.py test split as a raw DataFrame"""
+    from train import StageCache, build_stages
+
+    stages = build_stages(DATA_FILE, 0.2, random_state, StageCache(cache_dir, lambda msg: None))
+    return stages['load'][1]().iloc[stages['split'][1]()[1]]
+
+
+def _memory_mb():
+    """Return (current RSS, peak RSS) of this process in MB; current is None if unknown"""
+    try:
+        with open('/proc/self/status') as f:
+            fields = dict(line.split(':', 1) for line in f)
+        return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux and the BSDs
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None, peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _reset_peak_memory():
+    """Restart the peak RSS watermark from the current RSS; False where that is unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def measure_serving(bundle_path, population_path, latency_calls=COMPARE_LATENCY_CALLS):
+    """Measure one bundle as served; runs in its own process via --measure"""
+    import gc
+    from scoring import load_plan
+
+    # The harness's own memory (pandas, the batch) is the baseline; the
+    # model is charged only for what loading and scoring it adds
+    population = pd.read_csv(population_path)
+    gc.collect()
+    # Without a resettable watermark the peak would include the harness,
+    # so model memory is reported as unknown (NaN) rather than guessed
+    peak_reset = _reset_peak_memory()
+    base_rss, _ = _memory_mb()
+
+    plan = load_plan(bundle_path)
+
+    rows = list(population[FEATURE_COLUMNS].head(latency_calls).itertuples(index=False, name=None))
+    for row in rows[:100]:
+        plan.score_one(row)
+    latencies = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter_ns()
+        plan.score_one(row)
+        latencies[i] = time.perf_counter_ns() - start
+
+    start = time.perf_counter()
+    plan.score(population)
+    seconds = time.perf_counter() - start
+    return {'p50_us': float(np.percentile(latencies, 50)) / 1e3,
+            'p99_us': float(np.percentile(latencies, 99)) / 1e3,
+            'rows_per_s': round(len(population) / seconds),
+            'base_rss_mb': base_rss,
+            'model_peak_mb': _memory_mb()[1] - base_rss if peak_reset and base_rss else None}
+
+
+def compare(names=None, batch_rows=COMPARE_BATCH_ROWS, cache_dir=TRAIN_CACHE_DIR, log=print):
+    """Train, export and measure each named candidate; returns the results table"""
+    from sklearn.metrics import roc_auc_score
+    from benchmark import make_population
+    from scoring import load_plan
+
+    names = names or list(MODEL_CANDIDATES)
+    test = test_split(cache_dir=cache_dir)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        population_path = os.path.join(tmp, 'population.csv')
+        make_population(batch_rows).to_csv(population_path, index=False)
+
+        for name in names:
+            log(f"⚙️  {name}: training")
+            path = train_candidate(name, MODEL_CANDIDATES[name],
+                                   os.path.join(tmp, f'{name}.npz'), cache_dir)
+            auc = roc_auc_score(test[TARGET_COLUMN], load_plan(path).score(test)[:, 1])
+
+            log(f"⏱️  {name}: measuring")
+            measured = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--measure', path, population_path],
+                check=True, capture_output=True, text=True)
+            results.append({'model': name, 'roc_auc': auc,
+                            **json.loads(measured.stdout.splitlines()[-1]),
+                            'bundle_kb': os.path.getsize(path) / 1024})
+    return pd.DataFrame(results).set_index('model')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare candidate models on accuracy and cost")
+    parser.add_argument('--models', nargs='+', choices=list(MODEL_CANDIDATES),
+                        help="Candidates to compare (default: all)")
+    parser.add_argument('--rows', type=int, default=COMPARE_BATCH_ROWS,
+                        help="Rows in the throughput batch")
+    parser.add_argument('--cache-dir', default=TRAIN_CACHE_DIR)
+    parser.add_argument('--csv', help="Also write the table to this CSV")
+    parser.add_argument('--measure', nargs=2, metavar=('BUNDLE', 'POPULATION'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure_serving(*args.measure)))
+        return
+
+    table = compare(args.models, args.rows, args.cache_dir)
+    print(table.to_string(float_format=lambda v: f'{v:,.3f}'))
+    if args.csv:
+        table.to_csv(args.csv)
+
+
+if __name__ == "__main__":
+    main()
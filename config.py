@@ -16,7 +16,119 @@ LOGIN_PASSWORD = "password"
 MODEL_FILE = "logistic_regression_model.pkl"
 SCALER_FILE = "scaler.pkl"
 LABEL_ENCODERS_FILE = "label_encoders.pkl"
+BUNDLE_FILE = "churn_model.npz"
+TREE_BUNDLE_FILE = "churn_trees.npz"
 DATA_FILE = "HR_comma_sep.csv"
+TRAIN_CACHE_DIR = ".train_cache"
+
+# Database Settings
+DB_FILE = "Churn.db"
+DB_TABLE = "Churn"
+SCORES_TABLE = "ChurnScores"
+DB_SCORE_BATCH_SIZE = 50_000
+
+# Feature Columns (raw HR_comma_sep.csv names, in model input order)
+FEATURE_COLUMNS = [
+    'satisfaction_level', 'last_evaluation', 'number_project',
+    'average_montly_hours', 'time_spend_company', 'Work_accident',
+    'promotion_last_5years', 'Department', 'salary'
+]
+CATEGORICAL_COLUMNS = ['Department', 'salary']
+
+# Display names for the feature columns
+FEATURE_LABELS = {
+    'satisfaction_level': 'Satisfaction Level',
+    'last_evaluation': 'Last Evaluation Score',
+    'number_project': 'Number of Projects',
+    'average_montly_hours': 'Average Monthly Hours',
+    'time_spend_company': 'Years at Company',
+    'Work_accident': 'Work Accident',
+    'promotion_last_5years': 'Promotion in Last 5 Years',
+    'Department': 'Department',
+    'salary': 'Salary Level'
+}
+TARGET_COLUMN = 'left'
+
+# Column names the scaler was fitted with in train.py
+MODEL_COLUMN_NAMES = {
+    'satisfaction_level': 'satisfaction',
+    'last_evaluation': 'evaluation',
+    'number_project': 'projectCount',
+    'average_montly_hours': 'averageMonthlyHours',
+    'time_spend_company': 'yearsAtCompany',
+    'Work_accident': 'workAccident',
+    'promotion_last_5years': 'promotion',
+    'Department': 'Department',
+    'salary': 'salary'
+}
+
+# Prediction Cache Settings
+PREDICTION_CACHE_SIZE = 100_000
+PREDICTION_CACHE_WARMUP = 5_000
+
+# Micro-batching Settings (raise the wait for throughput, lower it for latency)
+MICROBATCH_MAX_WAIT_MS = 2.0
+MICROBATCH_MAX_SIZE = 256
+
+# Population contribution results kept per (data version, model version)
+CONTRIBUTION_CACHE_SIZE = 4
+
+# Risk band counts and histograms kept per (data version, model version)
+RISK_BAND_CACHE_SIZE = 4
+
+# Bins in the dashboard's leave-probability histogram
+RISK_HISTOGRAM_BINS = 20
+
+# Employees kept in each top-K risk ranking
+RANKING_TOP_K = 100
+
+# Rows per chunk when stream-scoring large CSV extracts
+STREAM_CHUNK_SIZE = 250_000
+
+# Hyperparameter search (search.py)
+SEARCH_GRID = {
+    'C': [0.01, 0.1, 1.0, 10.0, 100.0],
+    'penalty': ['l1', 'l2'],
+    'solver': ['lbfgs', 'liblinear', 'saga'],
+    'class_weight': [None, 'balanced'],
+}
+SEARCH_FOLDS = 5
+SEARCH_MAX_ITER = 1000
+
+# Gradient-boosted trees (tree_model.py); rows per block in the NumPy predictor,
+# and the deepest trees it lays out densely (2 ** depth leaves per tree)
+TREE_PARAMS = {'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 3}
+TREE_BLOCK_ROWS = 2048
+TREE_MAX_DEPTH = 12
+
+# Out-of-core SGD training (train_sgd.py)
+SGD_CHUNK_SIZE = 100_000
+SGD_EPOCHS = 5
+SGD_ALPHA = 1e-4
+# Kept apart from the deployed artifacts in the working directory; copy the
+# files over once the model has been checked
+SGD_OUTPUT_DIR = "models/sgd"
+
+# Model comparison (compare_models.py): candidates by name, each a training
+# kind ('logistic', 'sgd' or 'trees') and the parameters passed to it
+MODEL_CANDIDATES = {
+    'logistic': {'kind': 'logistic', 'params': {}},
+    'logistic_balanced': {'kind': 'logistic', 'params': {'class_weight': 'balanced'}},
+    'sgd': {'kind': 'sgd', 'params': {'epochs': SGD_EPOCHS, 'alpha': SGD_ALPHA}},
+    'gbm': {'kind': 'trees', 'params': {}},
+    'gbm_deep': {'kind': 'trees', 'params': {'n_estimators': 200, 'max_depth': 5}},
+}
+COMPARE_LATENCY_CALLS = 5_000
+COMPARE_BATCH_ROWS = 200_000
+
+# Incremental refresh from new Churn.db rows (refresh.py)
+REFRESH_CHECKPOINT_FILE = "refresh_checkpoint.json"
+REFRESH_MODELS_DIR = "models"
+REFRESH_MAX_ITER = 25
+
+# Scoring Service Settings
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8600
 
 # UI Colors and Styling
 COLORS = {
@@ -34,12 +146,12 @@ PREDICTION_THRESHOLDS = {
     "high_risk": 0.3
 }
 
-# Feature Ranges
+# Feature Ranges (min, max, default, step), keyed by HR_comma_sep.csv column
 FEATURE_RANGES = {
     "satisfaction_level": (0.0, 1.0, 0.5, 0.01),
     "last_evaluation": (0.0, 1.0, 0.5, 0.01),
     "number_project": (1, 10, 5, 1),
-    "average_monthly_hours": (80, 400, 200, 10),
+    "average_montly_hours": (80, 400, 200, 10),
     "time_spend_company": (1, 10, 5, 1)
 }
 
@@ -52,6 +164,12 @@ DEPARTMENTS = [
 # Salary Options
 SALARY_LEVELS = ['low', 'medium', 'high']
 
+# Category used in place of an unseen Department/salary value when scoring
+CATEGORY_FALLBACKS = {
+    'Department': 'sales',
+    'salary': 'low'
+}
+
 # Navigation Pages
 NAVIGATION_PAGES = [
     "🏠 Dashboard",
@@ -0,0 +1,71 @@
+"""
+Per-feature contribution breakdowns for Employee Churn Prediction
+
+For the logistic model a prediction's log-odds split exactly into one term
+per feature (coefficient x scaled value) plus the log-odds of an average
+employee, so "why is this employee at risk" is one vectorized multiply.
+Population results are cached per (data version, model version).
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_COLUMNS, CONTRIBUTION_CACHE_SIZE
+from scoring import encode_features, encode_rows, normalize_inputs
+
+_population_cache = OrderedDict()
+
+
+def data_version(df):
+    """Return a short content hash of a DataFrame"""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()[:12]
+
+
+def employee_contributions(plan, employee):
+    """Return one employee's per-feature contributions as a Series"""
+    X = encode_rows([normalize_inputs(employee)], plan.category_tables)
+    return pd.Series(plan.contributions(X)[0], index=FEATURE_COLUMNS)
+
+
+def population_contributions(df, plan, df_version=None):
+    """Return an (n, features) DataFrame of contributions for every row of df
+
+    Results are cached per data and model version, so dashboard reruns
+    with unchanged inputs are a dictionary lookup. Pass df_version (from
+    data_version(), computed once where df is loaded) to skip hashing df on
+    every call.
+    """
+    key = (df_version or data_version(df), plan.version)
+    cached = _population_cache.get(key)
+    if cached is not None:
+        _population_cache.move_to_end(key)
+        return cached
+
+    X = encode_features(df, plan.category_tables)
+    result = pd.DataFrame(plan.contributions(X), index=df.index, columns=FEATURE_COLUMNS)
+    _population_cache[key] = result
+    while len(_population_cache) > CONTRIBUTION_CACHE_SIZE:
+        _population_cache.popitem(last=False)
+    return result
+
+
+def top_drivers(contributions, k=3):
+    """Return the k features pushing each row hardest towards leaving"""
+    values = contributions.to_numpy()
+    k = min(k, values.shape[1])
+    top = np.argpartition(-values, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(values, top, axis=1), axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    names = np.asarray(contributions.columns)[top]
+    return pd.DataFrame(names, index=contributions.index,
+                        columns=[f'driver_{i + 1}' for i in range(k)])
+
+
+def department_drivers(df, contributions, k=3):
+    """Return mean contributions per department and its top k drivers"""
+    means = contributions.groupby(df['Department']).mean()
+    return means.join(top_drivers(means, k))
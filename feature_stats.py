@@ -0,0 +1,150 @@
+"""
+Streaming, mergeable feature statistics for Employee Churn Prediction
+
+FeatureStats keeps the count, mean and sum of squared deviations (M2) of
+every feature. It takes chunks of any size in one pass. Each chunk's own
+mean and M2 are folded in with the pairwise update of Chan et al.,
+Welford's algorithm applied a chunk at a time. This is numerically
+stable: it never subtracts two large sums of squares.
+
+The same update merges two FeatureStats, so statistics computed
+separately on shards, in other processes or on yesterday's rows combine
+into exactly the statistics of the union. `mean` and `scale` are what
+StandardScaler would learn from all those rows. They can go straight
+into write_bundle() or ScoringPlan.from_weights(), and to_scaler()
+returns the fitted StandardScaler for the .pkl artifacts.
+
+Usage:
+    python feature_stats.py part-1.csv part-2.csv --workers 2
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+
+from config import FEATURE_COLUMNS, SGD_CHUNK_SIZE
+
+
+class FeatureStats:
+    """Per-feature count, mean and variance, updated chunk by chunk"""
+
+    def __init__(self, n_features=len(FEATURE_COLUMNS)):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    @classmethod
+    def from_moments(cls, count, mean, var):
+        """Rebuild statistics from a count, means and (population) variances"""
+        stats = cls(len(mean))
+        stats.count = int(count)
+        stats.mean = np.array(mean, dtype=np.float64)
+        stats.m2 = np.array(var, dtype=np.float64) * count
+        return stats
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        if count == 0:
+            return
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def update(self, X):
+        """Fold in the rows of X (n_rows x n_features, or one row)"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X):
+            mean = X.mean(axis=0)
+            self._combine(len(X), mean, ((X - mean) ** 2).sum(axis=0))
+        return self
+
+    def merge(self, other):
+        """Fold in another FeatureStats, e.g. from a different shard"""
+        self._combine(other.count, other.mean, other.m2)
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / max(self.count, 1)
+
+    @property
+    def scale(self):
+        # StandardScaler leaves (near-)constant features unscaled
+        scale = np.sqrt(self.var)
+        return np.where(scale < 10 * np.finfo(np.float64).eps, 1.0, scale)
+
+    def transform(self, X):
+        """Standardize X as the fitted StandardScaler would"""
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+    def to_scaler(self, feature_names=None):
+        """Return a fitted StandardScaler holding these statistics"""
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler()
+        scaler.mean_ = self.mean.copy()
+        scaler.var_ = self.var
+        scaler.scale_ = self.scale
+        scaler.n_samples_seen_ = self.count
+        scaler.n_features_in_ = len(self.mean)
+        if feature_names is not None:
+            scaler.feature_names_in_ = np.array(feature_names, dtype=object)
+        return scaler
+
+
+def chunk_stats(chunks, category_tables=None):
+    """Return the FeatureStats of an iterable of raw or encoded chunks
+
+    DataFrame chunks with the HR_comma_sep.csv columns are encoded with
+    category_tables (default: the fixed DEPARTMENTS and SALARY_LEVELS
+    codes) first.
+    """
+    from scoring import compile_category_tables, encode_features
+
+    stats = FeatureStats()
+    for chunk in chunks:
+        if not isinstance(chunk, np.ndarray):
+            if category_tables is None:
+                from train_sgd import fixed_label_encoders
+                category_tables = compile_category_tables(fixed_label_encoders())
+            chunk = encode_features(chunk, category_tables)
+        stats.update(chunk)
+    return stats
+
+
+def _file_stats(task):
+    from train_sgd import iter_chunks
+
+    data_file, chunk_size = task
+    return chunk_stats(iter_chunks(data_file, chunk_size=chunk_size))
+
+
+def shard_stats(data_files, workers=None, chunk_size=SGD_CHUNK_SIZE):
+    """Compute each CSV shard's statistics in a process pool and merge them"""
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(_file_stats, [(path, chunk_size) for path in data_files]))
+    return reduce(FeatureStats.merge, parts, FeatureStats())
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Feature statistics over CSV shards")
+    parser.add_argument('data', nargs='+', help="CSVs with the HR_comma_sep.csv columns")
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=SGD_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    stats = shard_stats(args.data, args.workers, args.chunk_size)
+    print(f"{stats.count:,} rows")
+    print(pd.DataFrame({'mean': stats.mean, 'std': np.sqrt(stats.var), 'scale': stats.scale},
+                       index=FEATURE_COLUMNS).to_string(float_format=lambda v: f'{v:.6g}'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Async micro-batching for concurrent single-employee predictions
+
+MicroBatcher is a building block for asyncio callers, such as an ASGI
+service that receives many concurrent single-employee requests. server.py
+does not use it: that server runs one thread per request, and
+plan.score_one answers a request in microseconds. Holding requests back to
+form a batch would only add latency there.
+"""
+
+import asyncio
+import time
+
+import numpy as np
+
+from config import FEATURE_COLUMNS, MICROBATCH_MAX_WAIT_MS, MICROBATCH_MAX_SIZE
+from scoring import ScoringPlan, encode_rows
+
+
+class BatchMetrics:
+    """Running batch size and queue wait statistics"""
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_size = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, batch_size, waits):
+        self.batches += 1
+        self.rows += batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.total_wait += sum(waits)
+        self.max_wait = max(self.max_wait, max(waits))
+
+    def snapshot(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'mean_queue_wait_ms': 1000 * self.total_wait / self.rows if self.rows else 0.0,
+            'max_queue_wait_ms': 1000 * self.max_wait,
+        }
+
+
+class MicroBatcher:
+    """Coalesces concurrent predict() calls into one scoring matrix
+
+    A batch is flushed when it reaches max_batch_size rows or when its
+    oldest request has waited max_wait_ms, whichever comes first. A longer
+    wait builds bigger batches (throughput); a shorter one caps the delay
+    any single caller sees (latency).
+    """
+
+    def __init__(self, plan, max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+                 max_batch_size=MICROBATCH_MAX_SIZE):
+        self.plan = plan
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.metrics = BatchMetrics()
+        self._queue = None
+        self._worker = None
+
+    @classmethod
+    def from_artifacts(cls, model, scaler, label_encoders, **kwargs):
+        """Build a batcher in front of the objects returned by load_models()"""
+        return cls(ScoringPlan.from_artifacts(model, scaler, label_encoders), **kwargs)
+
+    async def predict(self, employee):
+        """Return (stay, leave) probabilities for one employee, scored as given"""
+        missing = [col for col in FEATURE_COLUMNS if col not in employee]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        # Encoded here, in the caller, so a malformed employee fails only its
+        # own request instead of every request that shares its batch
+        row = encode_rows([tuple(employee[col] for col in FEATURE_COLUMNS)],
+                          self.plan.category_tables)[0]
+        if not np.isfinite(row).all():
+            bad = [col for col, value in zip(FEATURE_COLUMNS, row) if not np.isfinite(value)]
+            raise ValueError(f"Non-finite values in columns {bad}")
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future, time.perf_counter()))
+        leave = await future
+        return 1.0 - leave, leave
+
+    async def close(self):
+        """Stop the background worker once queued requests are answered"""
+        if self._worker is not None:
+            await self._queue.join()
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            try:
+                X = np.vstack([row for row, _, _ in batch])
+                leave = self.plan.predict_proba(X)[:, 1].tolist()
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future, _), p in zip(batch, leave):
+                    if not future.done():
+                        future.set_result(p)
+            self.metrics.record(len(batch), [started - queued for _, _, queued in batch])
+            for _ in batch:
+                self._queue.task_done()
@@ -0,0 +1,227 @@
+"""
+Versioned, pickle-free model bundle for Employee Churn Prediction
+
+The bundle is a single .npz file holding the logistic coefficients, the
+StandardScaler statistics and the category vocabularies as plain arrays,
+plus a JSON manifest describing the feature schema: column order, the
+train.py alias of every column, dtypes and vocabularies. The manifest also
+records a SHA-256 over itself and every array.
+
+Everything is checked once in load_bundle(). After that, scoring a plain
+float matrix with plan.predict_proba() runs no per-call validation at all,
+and FeatureSchema.to_matrix() resolves either naming convention (the raw
+HR_comma_sep.csv names or the train.py names) into that matrix.
+
+Loading needs NumPy only: no scikit-learn, no joblib, no pickle.
+
+The manifest's model_type says which arrays follow: 'logistic_regression'
+(coef, intercept and scaler statistics) or 'gradient_boosting' (flattened
+trees, see tree_model.py). Both load as plans with the same interface.
+
+Usage:
+    python model_bundle.py               # export the .pkl artifacts to BUNDLE_FILE
+    python model_bundle.py --output other.npz
+"""
+
+import argparse
+import hashlib
+import json
+
+import numpy as np
+
+from config import (BUNDLE_FILE, FEATURE_COLUMNS, CATEGORICAL_COLUMNS,
+                    CATEGORY_FALLBACKS, MODEL_COLUMN_NAMES)
+from scoring import CATEGORY_LEVELS, CategoryTable, ScoringPlan, encode_features
+
+BUNDLE_FORMAT_VERSION = 2
+
+# Flags and counts are stored as integers; everything else numeric is a float
+INTEGER_COLUMNS = ['number_project', 'average_montly_hours', 'time_spend_company',
+                   'Work_accident', 'promotion_last_5years']
+
+
+def _content_hash(manifest, arrays):
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode())
+    for name in sorted(arrays):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()
+
+
+def feature_dtype(col):
+    """Return the manifest dtype of a feature column"""
+    if col in CATEGORICAL_COLUMNS:
+        return 'category'
+    return 'int64' if col in INTEGER_COLUMNS else 'float64'
+
+
+class FeatureSchema:
+    """Feature order, aliases, dtypes and vocabularies from a bundle manifest"""
+
+    def __init__(self, features):
+        self.features = features
+        self.columns = [f['name'] for f in features]
+        self.aliases = {f['alias']: f['name'] for f in features}
+        self.dtypes = {f['name']: f['dtype'] for f in features}
+        self.vocabularies = {f['name']: f['vocabulary'] for f in features
+                             if f['dtype'] == 'category'}
+
+    def resolve(self, columns):
+        """Map each schema column to the name it has in `columns`"""
+        present = set(columns)
+        alias_of = {name: alias for alias, name in self.aliases.items()}
+        resolved = {}
+        for name in self.columns:
+            if name in present:
+                resolved[name] = name
+            elif alias_of[name] in present:
+                resolved[name] = alias_of[name]
+            else:
+                raise ValueError(f"Missing column '{name}' (or '{alias_of[name]}')")
+        return resolved
+
+    def to_matrix(self, df, plan):
+        """Encode a frame keyed by raw or train.py column names into a float matrix"""
+        resolved = self.resolve(df.columns)
+        return encode_features({name: df[source] for name, source in resolved.items()},
+                               plan.category_tables)
+
+
+def build_manifest(vocabularies, fallbacks=CATEGORY_FALLBACKS,
+                   model_type='logistic_regression'):
+    """Describe the feature schema of a bundle"""
+    features = []
+    for col in FEATURE_COLUMNS:
+        feature = {'name': col, 'alias': MODEL_COLUMN_NAMES[col], 'dtype': feature_dtype(col)}
+        if col in CATEGORICAL_COLUMNS:
+            feature.update(vocabulary=list(vocabularies[col]), fallback=fallbacks[col])
+        features.append(feature)
+    return {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'model_type': model_type,
+        'features': features,
+    }
+
+
+def export_bundle(model, scaler, label_encoders, path=BUNDLE_FILE,
+                  fallbacks=CATEGORY_FALLBACKS):
+    """Write a fitted model, scaler and label encoders as a model bundle"""
+    if not hasattr(model, 'coef_') or model.coef_.shape[0] != 1:
+        raise ValueError("Model bundles hold a binary linear model")
+    n_features = len(FEATURE_COLUMNS)
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return write_bundle(model.coef_[0], model.intercept_[0], mean, scale,
+                        {col: [str(c) for c in label_encoders[col].classes_]
+                         for col in CATEGORICAL_COLUMNS},
+                        path, fallbacks)
+
+
+def write_bundle(coef, intercept, mean, scale, vocabularies, path=BUNDLE_FILE,
+                 fallbacks=CATEGORY_FALLBACKS, metadata=None):
+    """Write raw coefficients, scaler statistics and vocabularies as a bundle
+
+    metadata holds extra manifest entries, such as the model_version a
+    refresh (refresh.py) stamps on each bundle it publishes.
+    """
+    arrays = {
+        'coef': np.asarray(coef, dtype=np.float64).ravel(),
+        'intercept': np.asarray([intercept], dtype=np.float64).ravel(),
+        'scaler_mean': np.asarray(mean, dtype=np.float64),
+        'scaler_scale': np.asarray(scale, dtype=np.float64),
+    }
+    manifest = build_manifest(vocabularies, fallbacks)
+    manifest.update(metadata or {})
+    return save_bundle(manifest, arrays, path)
+
+
+def save_bundle(manifest, arrays, path=BUNDLE_FILE):
+    """Stamp the manifest with its content hash and write the .npz"""
+    manifest['content_hash'] = _content_hash(manifest, arrays)
+    with open(path, 'wb') as f:
+        np.savez(f, manifest=np.array(json.dumps(manifest)), **arrays)
+    return path
+
+
+def _validate_logistic(arrays):
+    for name in ('coef', 'scaler_mean', 'scaler_scale'):
+        if arrays[name].shape != (len(FEATURE_COLUMNS),):
+            raise ValueError(f"Bundle array '{name}' has shape {arrays[name].shape}")
+    if arrays['intercept'].shape != (1,):
+        raise ValueError("Bundle intercept must hold one value")
+    if not all(np.isfinite(a).all() for a in arrays.values()):
+        raise ValueError("Bundle holds non-finite weights")
+    if (arrays['scaler_scale'] <= 0).any():
+        raise ValueError("Bundle scaler scales must be positive")
+
+
+def validate_bundle(manifest, arrays):
+    """Raise ValueError unless the bundle is intact and fits this code's schema"""
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format_version')}")
+    recorded = manifest.pop('content_hash', None)
+    if recorded != _content_hash(manifest, arrays):
+        raise ValueError("Bundle content hash does not match; the file is corrupt or edited")
+    manifest['content_hash'] = recorded
+
+    schema = FeatureSchema(manifest['features'])
+    if schema.columns != FEATURE_COLUMNS:
+        raise ValueError(f"Bundle features {schema.columns} do not match {FEATURE_COLUMNS}")
+    wrong = {col: dtype for col, dtype in schema.dtypes.items() if dtype != feature_dtype(col)}
+    if wrong:
+        raise ValueError(f"Bundle dtypes {wrong} do not match "
+                         f"{ {col: feature_dtype(col) for col in wrong} }")
+    model_type = manifest.get('model_type')
+    if model_type == 'logistic_regression':
+        _validate_logistic(arrays)
+    elif model_type == 'gradient_boosting':
+        from tree_model import validate_tree_arrays
+        validate_tree_arrays(arrays, len(FEATURE_COLUMNS))
+    else:
+        raise ValueError(f"Unsupported bundle model type '{model_type}'")
+    for col, vocabulary in schema.vocabularies.items():
+        missing = set(CATEGORY_LEVELS[col]) - set(vocabulary)
+        if missing:
+            raise ValueError(f"Bundle vocabulary for '{col}' is missing {sorted(missing)}")
+    return schema
+
+
+def load_bundle(path=BUNDLE_FILE):
+    """Load and validate a model bundle as a plan using NumPy only
+
+    Logistic bundles load as a ScoringPlan and tree bundles as a
+    TreeEnsemblePlan. The plan carries the validated `schema` and the bundle `content_hash`.
+    """
+    with np.load(path, allow_pickle=False) as bundle:
+        manifest = json.loads(str(bundle['manifest']))
+        arrays = {name: bundle[name] for name in bundle.files if name != 'manifest'}
+
+    schema = validate_bundle(manifest, arrays)
+    tables = {f['name']: CategoryTable(f['vocabulary'], f['fallback'])
+              for f in manifest['features'] if f['dtype'] == 'category'}
+    if manifest['model_type'] == 'gradient_boosting':
+        from tree_model import TreeEnsemblePlan
+        plan = TreeEnsemblePlan.from_arrays(arrays, tables)
+    else:
+        plan = ScoringPlan.from_weights(arrays['coef'], float(arrays['intercept'][0]),
+                                        arrays['scaler_mean'], arrays['scaler_scale'], tables)
+    plan.schema = schema
+    plan.content_hash = manifest['content_hash']
+    return plan
+
+
+def main():
+    from scoring import load_artifacts
+
+    parser = argparse.ArgumentParser(description="Export the .pkl artifacts as a model bundle")
+    parser.add_argument('--output', default=BUNDLE_FILE)
+    args = parser.parse_args()
+
+    path = export_bundle(*load_artifacts(), path=args.output)
+    plan = load_bundle(path)
+    print(f"✅ Model bundle written to {path} "
+          f"(version {plan.version}, sha256 {plan.content_hash[:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Multi-process population scoring for Employee Churn Prediction
+
+The input CSV is split into byte ranges on line boundaries and every worker
+parses, encodes and scores its own ranges. Workers never receive the model
+or any rows by pickle: the plan's weights and category vocabularies live in
+one shared memory block they attach to at startup, and each worker writes
+its probabilities straight into a shared output array at the right offset.
+"""
+
+import io
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from scoring import CategoryTable, ScoringPlan, load_plan
+
+_HEADER = np.dtype([('n_weights', np.int64), ('vocab_bytes', np.int64)])
+
+_worker_shm = None
+_worker_plan = None
+
+
+def pack_plan(plan):
+    """Return the plan's weights and category tables as one byte string"""
+    if not isinstance(plan, ScoringPlan):
+        raise ValueError("ParallelScorer shares logistic plans only")
+    weights = np.concatenate(([plan.intercept], plan.coef)).astype(np.float64)
+    vocab = json.dumps({
+        col: {'classes': [str(c) for c in table.classes], 'fallback': table.fallback}
+        for col, table in plan.category_tables.items()
+    }).encode()
+    header = np.array([(len(weights), len(vocab))], dtype=_HEADER)
+    return header.tobytes() + weights.tobytes() + vocab
+
+
+def unpack_plan(buf):
+    """Rebuild a ScoringPlan whose weights are a view into buf"""
+    header = np.frombuffer(buf, dtype=_HEADER, count=1)[0]
+    n_weights, vocab_bytes = int(header['n_weights']), int(header['vocab_bytes'])
+    weights = np.frombuffer(buf, dtype=np.float64, count=n_weights, offset=_HEADER.itemsize)
+    vocab_start = _HEADER.itemsize + weights.nbytes
+    vocab = json.loads(bytes(buf[vocab_start:vocab_start + vocab_bytes]))
+    tables = {col: CategoryTable(spec['classes'], spec['fallback'])
+              for col, spec in vocab.items()}
+    return ScoringPlan(weights[1:], weights[0], tables)
+
+
+def _init_worker(weights_name):
+    global _worker_shm, _worker_plan
+    _worker_shm = shared_memory.SharedMemory(name=weights_name)
+    _worker_plan = unpack_plan(_worker_shm.buf)
+
+
+def _read_range(path, start, stop):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(stop - start)
+
+
+def _count_rows(path, start, stop):
+    chunk = _read_range(path, start, stop)
+    return chunk.count(b'\n') + (1 if chunk and not chunk.endswith(b'\n') else 0)
+
+
+def _score_range(path, start, stop, columns, out_name, n_rows, row_offset):
+    chunk = _read_range(path, start, stop)
+    df = pd.read_csv(io.BytesIO(chunk), header=None, names=columns)
+    for table in _worker_plan.category_tables.values():
+        table.unknown.clear()
+
+    out = shared_memory.SharedMemory(name=out_name)
+    try:
+        leave = np.ndarray((n_rows,), dtype=np.float64, buffer=out.buf)
+        leave[row_offset:row_offset + len(df)] = _worker_plan.score(df)[:, 1]
+        del leave
+    finally:
+        out.close()
+    return len(df), {col: dict(table.unknown) for col, table in _worker_plan.category_tables.items()}
+
+
+def split_ranges(path, n_ranges):
+    """Split a CSV into byte ranges that start and end on line boundaries
+
+    Returns the header columns and a list of (start, stop) offsets covering
+    every data row exactly once.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        columns = f.readline().decode().strip().split(',')
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, n_ranges):
+            target = data_start + (size - data_start) * i // n_ranges
+            if target <= bounds[-1]:
+                continue
+            f.seek(target)
+            f.readline()
+            if f.tell() < size and f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+        bounds.append(size)
+    return columns, [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+class ParallelScorer:
+    """Process pool that scores large CSV extracts on every core"""
+
+    def __init__(self, plan=None, workers=None):
+        self.plan = plan or load_plan()
+        self.workers = workers or os.cpu_count()
+        packed = pack_plan(self.plan)
+        self._weights = shared_memory.SharedMemory(create=True, size=len(packed))
+        self._weights.buf[:len(packed)] = packed
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                         initargs=(self._weights.name,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut the workers down and free the shared weights"""
+        self._pool.shutdown()
+        self._weights.close()
+        self._weights.unlink()
+
+    def score_file(self, path, ranges_per_worker=4):
+        """Return an (n, 2) array of stay/leave probabilities in file order"""
+        columns, ranges = split_ranges(path, self.workers * ranges_per_worker)
+        counts = list(self._pool.map(_count_rows, *zip(*[(path, a, b) for a, b in ranges])))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        n_rows = int(offsets[-1])
+
+        out = shared_memory.SharedMemory(create=True, size=max(n_rows, 1) * 8)
+        try:
+            futures = [self._pool.submit(_score_range, path, a, b, columns,
+                                         out.name, n_rows, int(offset))
+                       for (a, b), offset in zip(ranges, offsets)]
+            for future, expected in zip(futures, counts):
+                parsed, unknown = future.result()
+                if parsed != expected:
+                    raise ValueError(f"Parsed {parsed} rows where {expected} lines were "
+                                     f"counted; blank lines are not supported")
+                for col, values in unknown.items():
+                    self.plan.category_tables[col].unknown.update(Counter(values))
+            leave = np.ndarray((n_rows,), dtype=np.float64, buffer=out.buf).copy()
+        finally:
+            out.close()
+            out.unlink()
+        return np.column_stack((1.0 - leave, leave))
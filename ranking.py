@@ -0,0 +1,103 @@
+"""
+Top-K highest-risk employee ranking for Employee Churn Prediction
+
+Rankings are kept for the whole company, every department and every
+salary band. Selection uses argpartition, so each ranking costs O(n) and
+only the K winners are ever sorted. After the initial build, update()
+re-scores only the rows that changed. A group is rescanned only when one
+of its current top-K rows drops out of it or scores lower.
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_COLUMNS, RANKING_TOP_K
+from scoring import encode_features
+
+GROUP_COLUMNS = ('Department', 'salary')
+COMPANY = ('company', None)
+
+
+class RiskRanking:
+    """Top-K churn risk rankings over a scored employee population"""
+
+    def __init__(self, plan, df, k=RANKING_TOP_K):
+        self.plan = plan
+        self.k = k
+        self.scores, self.codes = self._score(df)
+        self._top = {COMPANY: self._select(np.arange(len(self.scores)))}
+        for col in GROUP_COLUMNS:
+            # NumPy's stable argsort on 16-bit codes is a linear-time radix
+            # sort; it lays every group out as one contiguous slice
+            order = np.argsort(self.codes[col], kind='stable')
+            bounds = np.cumsum(np.bincount(self.codes[col],
+                                           minlength=len(self.plan.category_tables[col].classes)))
+            for code, (start, stop) in enumerate(zip(np.r_[0, bounds[:-1]], bounds)):
+                self._top[(col, code)] = self._select(order[start:stop])
+
+    def _score(self, df):
+        # The group codes are read back out of the encoded matrix rather
+        # than encoding the category columns a second time
+        X = encode_features(df, self.plan.category_tables)
+        codes = {col: X[:, FEATURE_COLUMNS.index(col)].astype(np.int16) for col in GROUP_COLUMNS}
+        return self.plan.predict_proba(X)[:, 1], codes
+
+    def _select(self, rows):
+        """Return the (at most) k rows with the highest scores, highest first"""
+        if len(rows) > self.k:
+            rows = rows[np.argpartition(-self.scores[rows], self.k - 1)[:self.k]]
+        return rows[np.argsort(-self.scores[rows], kind='stable')]
+
+    def _members(self, key):
+        if key == COMPANY:
+            return np.arange(len(self.scores))
+        col, code = key
+        return np.flatnonzero(self.codes[col] == code)
+
+    def groups(self, by):
+        """Return the group names ranked under `by` ('Department' or 'salary')"""
+        return list(self.plan.category_tables[by].classes)
+
+    def top(self, by=None, value=None):
+        """Return the top-K rows as a DataFrame of row position and probability
+
+        With no arguments the ranking covers the whole company; otherwise
+        `by` is 'Department' or 'salary' and `value` one of its categories.
+        """
+        if by is None:
+            key = COMPANY
+        else:
+            key = (by, self.plan.category_tables[by].codes[value])
+        rows = self._top[key]
+        return pd.DataFrame({'row': rows, 'leave_probability': self.scores[rows]})
+
+    def update(self, rows, df):
+        """Re-score the employees at positions `rows` with their new values in df
+
+        Returns the number of rankings that needed a full group rescan.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        new_scores, new_codes = self._score(df)
+        old_scores = self.scores[rows]
+
+        self.scores[rows] = new_scores
+        for col in GROUP_COLUMNS:
+            self.codes[col][rows] = new_codes[col]
+
+        rescans = 0
+        for key, top in self._top.items():
+            if key == COMPANY:
+                now_member = np.ones(len(rows), dtype=bool)
+            else:
+                col, code = key
+                now_member = new_codes[col] == code
+
+            # A top row that left the group or scored lower may have to be
+            # replaced by a row we never kept, so the group is rescanned
+            in_top = np.isin(rows, top)
+            if (in_top & (~now_member | (new_scores < old_scores))).any():
+                self._top[key] = self._select(self._members(key))
+                rescans += 1
+            elif now_member.any():
+                self._top[key] = self._select(np.union1d(top, rows[now_member]))
+        return rescans
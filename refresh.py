@@ -0,0 +1,253 @@
+"""
+Incremental model refresh for Employee Churn Prediction
+
+Learns from the rows appended to the Churn table in Churn.db since the
+last refresh without retraining on the history. The checkpoint holds
+everything a refresh needs, and nothing scales with the rows seen so far:
+
+    last_rowid   the last Churn rowid already learned from
+    scaler       running count, mean and variance of every feature
+    theta        intercept and coefficients on the unscaled features
+    precision    the Hessian of the training objective at theta
+
+A refresh reads only rows with a larger rowid and folds them into the
+scaler statistics. It then warm-starts logistic regression from theta.
+The Newton steps use only the new rows plus a quadratic penalty, built from
+`precision`, that pulls theta back toward the previous fit. This is the
+Laplace approximation of refitting on every row ever seen, including the
+L2 penalty of the original fit, so the result tracks a full retrain
+closely.
+
+theta and precision are kept on unscaled features, so moving the scaler
+only changes coordinates. A refresh costs a few passes over the new rows
+and 10 x 10 linear algebra.
+
+Each refresh writes a new versioned bundle and then replaces the deployed
+bundle. The checkpoint is written last. Every file is written to a
+temporary name and renamed, so a reader sees the old model or the new
+one, never a partial file. A refresh interrupted before the checkpoint is
+written simply learns the same rows again on the next run.
+
+Usage:
+    python refresh.py --init       # checkpoint the train.py model at the table's current end
+    python refresh.py              # learn from the rows added since, publish a new version
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import (DATA_FILE, DB_FILE, DB_TABLE, BUNDLE_FILE, FEATURE_COLUMNS,
+                    CATEGORICAL_COLUMNS, TARGET_COLUMN, CATEGORY_FALLBACKS,
+                    TRAIN_CACHE_DIR, REFRESH_CHECKPOINT_FILE, REFRESH_MODELS_DIR,
+                    REFRESH_MAX_ITER)
+from feature_stats import FeatureStats
+from model_bundle import write_bundle
+from scoring import CategoryTable, encode_features, sigmoid
+
+
+def _to_unscaled(mean, scale):
+    """Return T with theta_unscaled = T @ theta_scaled, theta = (intercept, coef...)"""
+    T = np.diag(np.concatenate(([1.0], 1.0 / scale)))
+    T[0, 1:] = -mean / scale
+    return T
+
+
+def _design(X, mean, scale):
+    return np.column_stack((np.ones(len(X)), (X - mean) / scale))
+
+
+def _data_hessian(D, theta, weights):
+    p = sigmoid(D @ theta)
+    return D.T @ (D * (weights * p * (1.0 - p))[:, None])
+
+
+def newton_update(D, y, weights, theta0, prior, max_iter=REFRESH_MAX_ITER, tol=1e-10):
+    """Minimize the weighted log loss on D plus 0.5 (theta - theta0)' prior (theta - theta0)
+
+    Returns (theta, Hessian at theta); the Hessian is the next refresh's prior.
+    """
+    theta = theta0.copy()
+    for _ in range(max_iter):
+        p = sigmoid(D @ theta)
+        gradient = D.T @ (weights * (p - y)) + prior @ (theta - theta0)
+        hessian = _data_hessian(D, theta, weights) + prior
+        step = np.linalg.solve(hessian, gradient)
+        theta -= step
+        if np.abs(step).max() < tol:
+            break
+    return theta, _data_hessian(D, theta, weights) + prior
+
+
+def class_weights_of(model, y):
+    """Return the [stay, leave] sample weights the model was fit with"""
+    if model.class_weight is None:
+        return [1.0, 1.0]
+    if model.class_weight == 'balanced':
+        counts = np.bincount(y, minlength=2)
+        return (len(y) / (2.0 * counts)).tolist()
+    return [float(model.class_weight.get(c, 1.0)) for c in (0, 1)]
+
+
+def max_rowid(db_file=DB_FILE, table=DB_TABLE):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{table}"').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def read_new_rows(db_file, table, after_rowid):
+    """Return (rows with rowid > after_rowid, the largest rowid read)"""
+    columns = ', '.join(f'"{col}"' for col in FEATURE_COLUMNS + [TARGET_COLUMN])
+    conn = sqlite3.connect(db_file)
+    try:
+        df = pd.read_sql_query(f'SELECT rowid AS source_rowid, {columns} FROM "{table}" '
+                               'WHERE rowid > ? ORDER BY rowid', conn, params=(after_rowid,))
+    finally:
+        conn.close()
+    last = int(df['source_rowid'].iloc[-1]) if len(df) else after_rowid
+    return df.drop(columns='source_rowid'), last
+
+
+def _write_atomic(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def save_checkpoint(state, path=REFRESH_CHECKPOINT_FILE):
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(state, f, indent=1)
+    _write_atomic(path, write)
+
+
+def load_checkpoint(path=REFRESH_CHECKPOINT_FILE):
+    with open(path) as f:
+        return json.load(f)
+
+
+def init_checkpoint(data_file=DATA_FILE, db_file=DB_FILE, table=DB_TABLE, params=None,
+                    test_size=0.2, random_state=42, cache_dir=TRAIN_CACHE_DIR,
+                    checkpoint=REFRESH_CHECKPOINT_FILE, log=print):
+    """Checkpoint the train.py model; rows now in the table count as learned"""
+    from train import DEFAULT_PARAMS, StageCache, build_stages, train_artifacts
+
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    model, scaler, label_encoders = train_artifacts(data_file, params, test_size,
+                                                    random_state, cache_dir, log=log)
+    prepared = build_stages(data_file, test_size, random_state,
+                            StageCache(cache_dir, log))['scale'][1]()
+
+    # scikit-learn minimizes C * sum(weighted log loss) + ||coef||^2 / 2;
+    # divided by C, the penalty is a precision of 1 / C on each coefficient
+    y = prepared['y_train']
+    weights = np.asarray(class_weights_of(model, y))[y]
+    D = np.column_stack((np.ones(len(y)), prepared['X_train']))
+    theta = np.concatenate((model.intercept_, model.coef_[0]))
+    penalty = np.diag([0.0] + [1.0 / params['C']] * (D.shape[1] - 1))
+    hessian = _data_hessian(D, theta, weights) + penalty
+
+    T_inv = np.linalg.inv(_to_unscaled(scaler.mean_, scaler.scale_))
+    state = {
+        'version': 0,
+        'db_table': table,
+        'last_rowid': max_rowid(db_file, table),
+        'rows_learned': int(scaler.n_samples_seen_),
+        'scaler_mean': scaler.mean_.tolist(),
+        'scaler_var': scaler.var_.tolist(),
+        'theta': (_to_unscaled(scaler.mean_, scaler.scale_) @ theta).tolist(),
+        'precision': (T_inv.T @ hessian @ T_inv).tolist(),
+        'class_weights': class_weights_of(model, y),
+        'vocabularies': {col: [str(c) for c in label_encoders[col].classes_]
+                         for col in CATEGORICAL_COLUMNS},
+        'bundle': None,
+    }
+    save_checkpoint(state, checkpoint)
+    log(f"📌 Checkpointed the train.py model at {table} rowid {state['last_rowid']}")
+    return state
+
+
+def refresh(db_file=DB_FILE, checkpoint=REFRESH_CHECKPOINT_FILE,
+            models_dir=REFRESH_MODELS_DIR, deploy_path=BUNDLE_FILE, log=print):
+    """Learn from rows added since the checkpoint and publish a new model version
+
+    Returns the new checkpoint state, or None when there are no new rows.
+    """
+    start = time.perf_counter()
+    state = load_checkpoint(checkpoint)
+    df, last_rowid = read_new_rows(db_file, state['db_table'], state['last_rowid'])
+    if df.empty:
+        log(f"⏭️  No rows after rowid {state['last_rowid']}; model v{state['version']} stays")
+        return None
+
+    tables = {col: CategoryTable(state['vocabularies'][col], CATEGORY_FALLBACKS[col])
+              for col in CATEGORICAL_COLUMNS}
+    X = encode_features(df, tables)
+    y = df[TARGET_COLUMN].to_numpy()
+
+    stats = FeatureStats.from_moments(state['rows_learned'], state['scaler_mean'],
+                                      state['scaler_var']).update(X)
+    mean, scale = stats.mean, stats.scale
+    T = _to_unscaled(mean, scale)
+    theta0 = np.linalg.solve(T, np.asarray(state['theta']))
+    prior = T.T @ np.asarray(state['precision']) @ T
+    weights = np.asarray(state['class_weights'])[y]
+    theta, hessian = newton_update(_design(X, mean, scale), y, weights, theta0, prior)
+
+    version = state['version'] + 1
+    bundle = os.path.join(models_dir, f'churn_model-v{version:04d}.npz')
+    _write_atomic(bundle, lambda tmp: write_bundle(theta[1:], theta[0], mean, scale,
+                                                   state['vocabularies'], tmp,
+                                                   metadata={'model_version': version}))
+    if deploy_path:
+        _write_atomic(deploy_path, lambda tmp: shutil.copyfile(bundle, tmp))
+
+    T_inv = np.linalg.inv(T)
+    state.update(version=version, last_rowid=last_rowid, rows_learned=stats.count,
+                 scaler_mean=mean.tolist(), scaler_var=stats.var.tolist(),
+                 theta=(T @ theta).tolist(), precision=(T_inv.T @ hessian @ T_inv).tolist(),
+                 bundle=bundle)
+    save_checkpoint(state, checkpoint)
+    log(f"✅ Model v{version}: learned {len(df):,} rows (through rowid {last_rowid}) "
+        f"in {time.perf_counter() - start:.2f}s -> {bundle}")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the churn model from new Churn.db rows")
+    parser.add_argument('--init', action='store_true',
+                        help="Checkpoint the train.py model at the table's current last row")
+    parser.add_argument('--data', default=DATA_FILE, help="Training CSV for --init")
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--table', default=DB_TABLE, help="Table to follow (with --init)")
+    parser.add_argument('--checkpoint', default=REFRESH_CHECKPOINT_FILE)
+    parser.add_argument('--models-dir', default=REFRESH_MODELS_DIR,
+                        help="Where the versioned bundles are kept")
+    parser.add_argument('--deploy', default=BUNDLE_FILE,
+                        help="Bundle replaced by each new version ('' to skip)")
+    args = parser.parse_args()
+
+    if args.init:
+        init_checkpoint(args.data, args.db, args.table, checkpoint=args.checkpoint)
+    else:
+        refresh(args.db, args.checkpoint, args.models_dir, args.deploy or None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Population risk bands for Employee Churn Prediction
+
+Every employee is placed into one of the PREDICTION_THRESHOLDS bands using
+the same rule as the Prediction page: a stay probability above
+high_retention means high retention, above moderate_risk means moderate
+risk, and anything else means high risk. The whole population is banded in
+one vectorized pass. Band counts and the risk-score histogram are cached
+per (data version, model version).
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import PREDICTION_THRESHOLDS, RISK_BAND_CACHE_SIZE, RISK_HISTOGRAM_BINS
+from contributions import data_version
+
+# Lowest stay probability first, matching assign_bands() codes 0, 1, 2
+BANDS = ['high_risk', 'moderate_risk', 'high_retention']
+
+_summary_cache = OrderedDict()
+
+
+def assign_bands(stay, thresholds=PREDICTION_THRESHOLDS):
+    """Return the band code (an index into BANDS) for each stay probability
+
+    Three bands need two edges: moderate_risk and high_retention. Everything
+    at or below moderate_risk is high risk, as on the Prediction page.
+    thresholds['high_risk'] is deliberately not an edge. Using it would split
+    off a fourth band (stay probability between high_risk and moderate_risk)
+    that the Prediction page has never shown.
+    """
+    edges = [thresholds['moderate_risk'], thresholds['high_retention']]
+    # side='left' counts the edges strictly below each value, so a
+    # probability exactly on a threshold stays in the lower band
+    return np.searchsorted(edges, np.asarray(stay), side='left')
+
+
+def band_of(stay, thresholds=PREDICTION_THRESHOLDS):
+    """Return the band name for one stay probability"""
+    return BANDS[int(assign_bands([stay], thresholds)[0])]
+
+
+def population_bands(df, plan, bins=RISK_HISTOGRAM_BINS, df_version=None):
+    """Return (band counts, leave-probability histogram) for every row of df
+
+    The counts are a Series indexed by BANDS. The histogram is a DataFrame
+    with one row per bin: bin_start, bin_end, employees and the band of the
+    bin midpoint. Results are cached per data and model version; df_version
+    works as in population_contributions().
+    """
+    key = (df_version or data_version(df), plan.version, bins)
+    cached = _summary_cache.get(key)
+    if cached is not None:
+        _summary_cache.move_to_end(key)
+        return cached
+
+    proba = plan.score(df)
+    codes = assign_bands(proba[:, 0])
+    counts = pd.Series(np.bincount(codes, minlength=len(BANDS)), index=BANDS)
+
+    employees, edges = np.histogram(proba[:, 1], bins=bins, range=(0.0, 1.0))
+    midpoints = (edges[:-1] + edges[1:]) / 2
+    histogram = pd.DataFrame({
+        'bin_start': edges[:-1],
+        'bin_end': edges[1:],
+        'employees': employees,
+        'band': np.asarray(BANDS)[assign_bands(1 - midpoints)],
+    })
+
+    _summary_cache[key] = (counts, histogram)
+    while len(_summary_cache) > RISK_BAND_CACHE_SIZE:
+        _summary_cache.popitem(last=False)
+    return counts, histogram
@@ -0,0 +1,336 @@
+"""
+Vectorized scoring for Employee Churn Prediction
+"""
+
+import hashlib
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from config import (MODEL_FILE, SCALER_FILE, LABEL_ENCODERS_FILE, BUNDLE_FILE,
+                    FEATURE_COLUMNS, CATEGORICAL_COLUMNS, DEPARTMENTS,
+                    SALARY_LEVELS, CATEGORY_FALLBACKS, PREDICTION_CACHE_SIZE,
+                    PREDICTION_CACHE_WARMUP)
+
+# joblib (and through the pickles, scikit-learn) and pandas are imported
+# where they are used, so a scoring-only process that loads a model bundle
+# starts on NumPy alone
+
+CATEGORY_LEVELS = {'Department': DEPARTMENTS, 'salary': SALARY_LEVELS}
+
+# Continuous inputs and the decimals the Prediction page sliders step in;
+# every other numeric input is an integer count or a 0/1 flag
+ROUNDED_COLUMNS = {'satisfaction_level': 2, 'last_evaluation': 2}
+
+
+def load_artifacts(model_file=MODEL_FILE, scaler_file=SCALER_FILE,
+                   label_encoders_file=LABEL_ENCODERS_FILE):
+    """Load the trained model, scaler and label encoders"""
+    import joblib
+    model = joblib.load(model_file)
+    scaler = joblib.load(scaler_file)
+    label_encoders = joblib.load(label_encoders_file)
+    return model, scaler, label_encoders
+
+
+class CategoryTable:
+    """Precomputed category -> code lookup replacing LabelEncoder.transform
+
+    Values the encoder never saw map to the fallback code and are tallied in
+    `unknown` instead of raising, so one bad row cannot sink a whole batch.
+    """
+
+    def __init__(self, classes, fallback):
+        self.classes = list(classes)
+        self.codes = {category: code for code, category in enumerate(self.classes)}
+        if fallback not in self.codes:
+            raise ValueError(f"Fallback category '{fallback}' is not in {self.classes}")
+        self.fallback = fallback
+        self.fallback_code = self.codes[fallback]
+        self.unknown = Counter()
+
+    @classmethod
+    def from_encoder(cls, encoder, categories, fallback):
+        """Compile a fitted LabelEncoder, checking it knows every category"""
+        missing = set(categories) - set(encoder.classes_)
+        if missing:
+            raise ValueError(f"Label encoder is missing categories: {sorted(missing)}")
+        return cls(encoder.classes_, fallback)
+
+    @property
+    def unknown_count(self):
+        return sum(self.unknown.values())
+
+    def encode_one(self, value):
+        """Return the code for a single category value"""
+        code = self.codes.get(value)
+        if code is None:
+            self.unknown[value] += 1
+            return self.fallback_code
+        return code
+
+    def encode(self, values):
+        """Return an int array of codes for an array of category values"""
+        import pandas as pd
+
+        # factorize hashes each row once; only the few distinct values then
+        # go through the dict, and the trailing -1 slot catches missing values
+        row_ids, uniques = pd.factorize(np.asarray(values, dtype=object))
+        lookup = np.array([self.codes.get(u, -1) for u in uniques] + [-1])
+        codes = lookup[row_ids]
+
+        unseen = codes < 0
+        if unseen.any():
+            counts = np.bincount(row_ids[unseen] + 1, minlength=len(uniques) + 1)
+            for uid in np.flatnonzero(counts):
+                value = uniques[uid - 1] if uid else None
+                self.unknown[value] += int(counts[uid])
+            codes[unseen] = self.fallback_code
+        return codes
+
+
+def compile_category_tables(label_encoders, fallbacks=CATEGORY_FALLBACKS):
+    """Compile the label encoders from train.py into CategoryTables"""
+    return {col: CategoryTable.from_encoder(label_encoders[col],
+                                            CATEGORY_LEVELS[col],
+                                            fallbacks[col])
+            for col in CATEGORICAL_COLUMNS}
+
+
+def encode_features(df, category_tables):
+    """Build the float feature matrix from raw HR_comma_sep.csv columns"""
+    X = np.empty((len(df[FEATURE_COLUMNS[0]]), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for i, col in enumerate(FEATURE_COLUMNS):
+        if col in CATEGORICAL_COLUMNS:
+            X[:, i] = category_tables[col].encode(df[col])
+        else:
+            X[:, i] = np.asarray(df[col], dtype=np.float64)
+    return X
+
+
+def encode_rows(rows, category_tables):
+    """Build the float feature matrix from FEATURE_COLUMNS-ordered tuples"""
+    X = np.empty((len(rows), len(FEATURE_COLUMNS)), dtype=np.float64)
+    for i, col in enumerate(FEATURE_COLUMNS):
+        values = [row[i] for row in rows]
+        if col in category_tables:
+            values = [category_tables[col].encode_one(value) for value in values]
+        X[:, i] = values
+    return X
+
+
+def sigmoid(z):
+    """Logistic function, computed via tanh so it never overflows"""
+    return 0.5 * np.tanh(0.5 * z) + 0.5
+
+
+class ScoringPlan:
+    """Logistic model with the StandardScaler folded into its coefficients
+
+    Scaling x to (x - mean) / scale and then taking coef . x + intercept is
+    the same as coef / scale . x + (intercept - coef / scale . mean), so a
+    prediction is one dot product and a sigmoid on the unscaled features.
+    """
+
+    def __init__(self, coef, intercept, category_tables, mean=None):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.category_tables = category_tables
+        # Scaler mean, the reference point for per-feature contributions
+        self.mean = None if mean is None else np.broadcast_to(
+            np.asarray(mean, dtype=np.float64), self.coef.shape).copy()
+        self._coef_list = self.coef.tolist()
+        self.version = self._fingerprint()
+        # Set by model_bundle.load_bundle for plans loaded from a bundle
+        self.schema = None
+        self.content_hash = None
+
+    def _fingerprint(self):
+        digest = hashlib.sha256(self.coef.tobytes())
+        digest.update(np.float64(self.intercept).tobytes())
+        for col in sorted(self.category_tables):
+            for category in self.category_tables[col].classes:
+                digest.update(f"{col}={category};".encode())
+        return digest.hexdigest()[:12]
+
+    @classmethod
+    def from_artifacts(cls, model, scaler, label_encoders,
+                       fallbacks=CATEGORY_FALLBACKS):
+        """Compile a plan from a fitted LogisticRegression and StandardScaler"""
+        if not hasattr(model, 'coef_') or model.coef_.shape[0] != 1:
+            raise ValueError("Scoring plans need a binary linear model")
+        mean = scaler.mean_ if scaler.with_mean else 0.0
+        scale = scaler.scale_ if scaler.with_std else 1.0
+        return cls.from_weights(model.coef_[0], model.intercept_[0], mean, scale,
+                                compile_category_tables(label_encoders, fallbacks))
+
+    @classmethod
+    def from_weights(cls, coef, intercept, mean, scale, category_tables):
+        """Compile a plan from raw coefficients and standardization statistics"""
+        coef = np.asarray(coef, dtype=np.float64) / scale
+        return cls(coef, intercept - np.dot(coef, mean), category_tables, mean)
+
+    def decision_function(self, X):
+        """Return the log-odds of leaving for an unscaled feature matrix"""
+        return X @ self.coef + self.intercept
+
+    def contributions(self, X):
+        """Return each feature's share of the log-odds, coef x scaled value
+
+        Row sums plus the log-odds of an average employee (the unscaled
+        model's intercept) give decision_function(X).
+        """
+        if self.mean is None:
+            raise ValueError("This plan was built without scaler statistics")
+        return (X - self.mean) * self.coef
+
+    def predict_proba(self, X):
+        """Return an (n, 2) array of stay/leave probabilities"""
+        leave = sigmoid(self.decision_function(X))
+        return np.column_stack((1.0 - leave, leave))
+
+    def score(self, df):
+        """Encode raw HR_comma_sep.csv columns and score them"""
+        return self.predict_proba(encode_features(df, self.category_tables))
+
+    def score_one(self, row):
+        """Return the leave probability for one row of raw feature values
+
+        row is a sequence in FEATURE_COLUMNS order. This stays in plain
+        Python floats, which beats NumPy call overhead for a single row.
+        """
+        z = self.intercept
+        for col, coef, value in zip(FEATURE_COLUMNS, self._coef_list, row):
+            if col in self.category_tables:
+                value = self.category_tables[col].encode_one(value)
+            z += coef * value
+        return 0.5 * math.tanh(0.5 * z) + 0.5
+
+
+def compile_plan(model_file=MODEL_FILE, scaler_file=SCALER_FILE,
+                 label_encoders_file=LABEL_ENCODERS_FILE):
+    """Load the three pickles and compile them into a ScoringPlan"""
+    return ScoringPlan.from_artifacts(
+        *load_artifacts(model_file, scaler_file, label_encoders_file))
+
+
+def load_plan(bundle_file=BUNDLE_FILE):
+    """Load the deployed model: the model bundle if present, else the pickles"""
+    if os.path.exists(bundle_file):
+        from model_bundle import load_bundle
+        return load_bundle(bundle_file)
+    return compile_plan()
+
+
+@lru_cache(maxsize=1)
+def _default_plan():
+    return load_plan()
+
+
+def score_batch(df, model=None, scaler=None, label_encoders=None):
+    """Return an (n, 2) array of stay/leave probabilities for every row of df
+
+    df holds the raw HR_comma_sep.csv feature columns (a DataFrame or any
+    mapping of column name to array). The model defaults to the deployed
+    one from load_plan().
+    """
+    if model is None:
+        plan = _default_plan()
+    else:
+        plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+    return plan.score(df)
+
+
+def normalize_inputs(inputs):
+    """Return the hashable FEATURE_COLUMNS tuple for one employee's inputs"""
+    row = []
+    for col in FEATURE_COLUMNS:
+        value = inputs[col]
+        if col in CATEGORICAL_COLUMNS:
+            row.append(str(value))
+        elif col in ROUNDED_COLUMNS:
+            row.append(round(float(value), ROUNDED_COLUMNS[col]))
+        else:
+            row.append(int(value))
+    return tuple(row)
+
+
+class PredictionCache:
+    """Thread-safe LRU cache of single-employee predictions
+
+    Entries are keyed by the normalized input tuple and belong to the plan
+    they were scored with; swapping in a plan with a different version
+    empties the cache.
+    """
+
+    def __init__(self, plan, maxsize=PREDICTION_CACHE_SIZE):
+        self.plan = plan
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_plan(self, plan):
+        """Switch to a new plan, dropping entries from an older model version"""
+        with self._lock:
+            if plan.version != self.plan.version:
+                self._entries.clear()
+            self.plan = plan
+
+    def predict(self, inputs):
+        """Return (stay, leave) probabilities for one employee"""
+        key = normalize_inputs(inputs)
+        with self._lock:
+            leave = self._entries.get(key)
+            if leave is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return 1.0 - leave, leave
+            self.misses += 1
+            plan = self.plan
+
+        leave = plan.score_one(key)
+        with self._lock:
+            if plan is self.plan:
+                self._store(key, leave)
+        return 1.0 - leave, leave
+
+    def _store(self, key, leave):
+        self._entries[key] = leave
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def warm_up(self, data, top_n=PREDICTION_CACHE_WARMUP):
+        """Pre-score the top_n most frequent input combinations in data"""
+        common = data[FEATURE_COLUMNS].value_counts().head(top_n)
+        keys = list(dict.fromkeys(
+            normalize_inputs(dict(zip(FEATURE_COLUMNS, values)))
+            for values in common.index))
+        if not keys:
+            return 0
+        leave = self.plan.predict_proba(encode_rows(keys, self.plan.category_tables))[:, 1]
+        with self._lock:
+            for key, p in zip(keys, leave.tolist()):
+                self._store(key, p)
+        return len(keys)
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        lookups = self.hits + self.misses
+        return {
+            'model_version': self.plan.version,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
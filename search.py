@@ -0,0 +1,165 @@
+"""
+Parallel hyperparameter search for Employee Churn Prediction
+
+Every candidate from the SEARCH_GRID product of C, penalty, solver and
+class_weight is cross-validated on the training split from train.py.
+Combinations a solver does not support are skipped. The stratified folds are encoded,
+split and scaled once (each fold's scaler sees only that fold's training
+rows). They are cached on disk like the other train.py stages and handed
+to each worker process once, so a candidate costs only its fits.
+(candidate, fold) pairs are spread over a process pool.
+
+The leaderboard ranks candidates by mean validation ROC-AUC. The winner
+is refit on the full training split and exported through train.train(),
+in the same artifact formats load_models() reads.
+
+Usage:
+    python search.py                            # all cores, export the winner
+    python search.py --workers 4 --folds 5 --leaderboard leaderboard.csv
+    python search.py --no-export
+"""
+
+import argparse
+import itertools
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+
+from config import DATA_FILE, TRAIN_CACHE_DIR, SEARCH_GRID, SEARCH_FOLDS, SEARCH_MAX_ITER
+from train import DEFAULT_PARAMS, StageCache, build_stages, stage_key, train
+
+# Penalties each solver supports
+SOLVER_PENALTIES = {
+    'lbfgs': {'l2'},
+    'newton-cg': {'l2'},
+    'sag': {'l2'},
+    'liblinear': {'l1', 'l2'},
+    'saga': {'l1', 'l2'},
+}
+
+# Leaderboard columns that are scores; every other column is a parameter
+SCORE_COLUMNS = ['roc_auc', 'roc_auc_std', 'accuracy', 'fit_seconds']
+
+_worker_folds = None
+
+
+def candidates(grid=SEARCH_GRID):
+    """Return every valid parameter combination of grid as a list of dicts"""
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    return [params for params in combos
+            if params['penalty'] in SOLVER_PENALTIES[params['solver']]]
+
+
+def fold_stage(encoded, train_rows, n_folds, random_state):
+    """Return [(X_fit, y_fit, X_val, y_val)] scaled per fold, float64 arrays"""
+    X = encoded['X'][train_rows]
+    y = encoded['y'][train_rows]
+    folds = []
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for fit_rows, val_rows in splitter.split(X, y):
+        scaler = StandardScaler().fit(X[fit_rows])
+        folds.append((scaler.transform(X[fit_rows]), y[fit_rows],
+                      scaler.transform(X[val_rows]), y[val_rows]))
+    return folds
+
+
+def _init_worker(folds):
+    global _worker_folds
+    _worker_folds = folds
+    warnings.filterwarnings('ignore', category=ConvergenceWarning)
+
+
+def _evaluate(task):
+    """Fit one candidate on one fold; runs in a worker process"""
+    candidate, fold, params, random_state = task
+    X_fit, y_fit, X_val, y_val = _worker_folds[fold]
+    start = time.perf_counter()
+    model = LogisticRegression(random_state=random_state, max_iter=SEARCH_MAX_ITER, **params)
+    model.fit(X_fit, y_fit)
+    leave = model.predict_proba(X_val)[:, 1]
+    return (candidate, roc_auc_score(y_val, leave), accuracy_score(y_val, leave >= 0.5),
+            time.perf_counter() - start)
+
+
+def search(data_file=DATA_FILE, grid=SEARCH_GRID, n_folds=SEARCH_FOLDS, workers=None,
+           test_size=0.2, random_state=42, cache_dir=TRAIN_CACHE_DIR, log=print):
+    """Cross-validate every candidate in parallel; returns the leaderboard DataFrame"""
+    cache = StageCache(cache_dir, log)
+    stages = build_stages(data_file, test_size, random_state, cache)
+    (encode_key, encode), (split_key, split) = stages['encode'], stages['split']
+    folds_key = stage_key('folds', encode_key, split_key, n_folds, random_state)
+    folds = cache.run('folds', folds_key,
+                      lambda: fold_stage(encode(), split()[0], n_folds, random_state))
+
+    params_list = candidates(grid)
+    tasks = [(i, fold, params, random_state)
+             for i, params in enumerate(params_list) for fold in range(n_folds)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(folds,)) as pool:
+        results = list(pool.map(_evaluate, tasks, chunksize=max(1, len(tasks) // 64)))
+    log(f"🔍 {len(params_list)} candidates x {n_folds} folds in "
+        f"{time.perf_counter() - start:.1f}s")
+
+    scores = pd.DataFrame(results, columns=['candidate', 'roc_auc', 'accuracy', 'fit_seconds'])
+    summary = scores.groupby('candidate').agg(
+        roc_auc=('roc_auc', 'mean'), roc_auc_std=('roc_auc', 'std'),
+        accuracy=('accuracy', 'mean'), fit_seconds=('fit_seconds', 'mean'))
+    leaderboard = pd.DataFrame(params_list).join(summary)
+    return leaderboard.sort_values(['roc_auc', 'fit_seconds'], ascending=[False, True]) \
+                      .reset_index(drop=True)
+
+
+def best_params(leaderboard):
+    """Return the winning row's parameters as LogisticRegression keyword arguments
+
+    The parameters are the leaderboard's non-score columns, so a leaderboard
+    from a custom grid (or a saved CSV) yields that grid's parameters.
+    """
+    winner = leaderboard.iloc[0].drop(SCORE_COLUMNS)
+    # A parameter missing from some candidates comes back as NaN; numpy
+    # scalars become plain Python values for LogisticRegression
+    params = {name: None if pd.isna(value) else getattr(value, 'item', lambda: value)()
+              for name, value in winner.items()}
+    if 'C' in params:
+        params['C'] = float(params['C'])
+    return {**DEFAULT_PARAMS, 'max_iter': SEARCH_MAX_ITER, **params}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search")
+    parser.add_argument('--data', default=DATA_FILE, help="CSV with the HR_comma_sep.csv columns")
+    parser.add_argument('--folds', type=int, default=SEARCH_FOLDS)
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache-dir', default=TRAIN_CACHE_DIR)
+    parser.add_argument('--leaderboard', help="Also write the leaderboard to this CSV")
+    parser.add_argument('--top', type=int, default=10, help="Leaderboard rows to print")
+    parser.add_argument('--output-dir', default='.', help="Where the winner is exported")
+    parser.add_argument('--no-export', action='store_true', help="Only print the leaderboard")
+    args = parser.parse_args()
+
+    leaderboard = search(args.data, n_folds=args.folds, workers=args.workers,
+                         random_state=args.seed, cache_dir=args.cache_dir)
+    print(leaderboard.head(args.top).to_string(float_format=lambda v: f'{v:.4f}'))
+    if args.leaderboard:
+        leaderboard.to_csv(args.leaderboard, index=False)
+
+    if not args.no_export:
+        params = best_params(leaderboard)
+        _, metrics, _ = train(args.data, args.output_dir, params, random_state=args.seed,
+                              cache_dir=args.cache_dir)
+        print(f"✅ Exported {params} to {os.path.abspath(args.output_dir)}: "
+              f"test accuracy {metrics['accuracy']:.3f}, ROC-AUC {metrics['roc_auc']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Sensitivity sweeps for the Prediction page
+
+For one employee profile, every value of every slider is scored in a
+single batched matrix, so all what-if curves come from one predict call
+instead of one rerun per slider position.
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_COLUMNS, FEATURE_RANGES
+from scoring import encode_rows, normalize_inputs
+
+
+def sweep_grid(ranges=FEATURE_RANGES):
+    """Return every slider position per feature as {column: values}"""
+    return {col: np.round(np.arange(low, high + step / 2, step), 10)
+            for col, (low, high, _, step) in ranges.items()}
+
+
+def sensitivity_sweep(plan, employee, ranges=FEATURE_RANGES):
+    """Return {column: DataFrame(value, leave_probability)} for one employee
+
+    Each curve varies one feature over its slider range while the others
+    stay at the employee's values. All curves are scored as one matrix.
+    """
+    base = encode_rows([normalize_inputs(employee)], plan.category_tables)
+    grids = sweep_grid(ranges)
+    X = np.repeat(base, sum(len(values) for values in grids.values()), axis=0)
+
+    start = 0
+    for col, values in grids.items():
+        X[start:start + len(values), FEATURE_COLUMNS.index(col)] = values
+        start += len(values)
+    leave = plan.predict_proba(X)[:, 1]
+
+    curves, start = {}, 0
+    for col, values in grids.items():
+        curves[col] = pd.DataFrame({'value': values,
+                                    'leave_probability': leave[start:start + len(values)]})
+        start += len(values)
+    return curves
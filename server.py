@@ -0,0 +1,201 @@
+"""
+JSON-over-HTTP scoring service for Employee Churn Prediction
+
+Endpoints:
+    GET  /health         liveness, 200 as soon as the server is listening
+    GET  /ready          200 once the model is loaded and warm, 503 before
+    GET  /stats          prediction cache and unknown-category counters
+    POST /predict        one employee as an object keyed by HR_comma_sep.csv columns
+    POST /predict/batch  a list of such objects, or {"employees": [...]}
+"""
+
+import argparse
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from config import DATA_FILE, FEATURE_COLUMNS, CATEGORICAL_COLUMNS, SERVER_HOST, SERVER_PORT
+from scoring import load_plan, normalize_inputs, encode_features, PredictionCache
+
+NUMERIC_COLUMNS = [col for col in FEATURE_COLUMNS if col not in CATEGORICAL_COLUMNS]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def check_employee(employee):
+    """Raise ValueError unless every feature is present and every numeric one is finite
+
+    Both endpoints apply this rule. Numeric features must be JSON numbers:
+    strings such as "0.5", null, NaN and Infinity are rejected, not coerced.
+    """
+    missing = [col for col in FEATURE_COLUMNS if col not in employee]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    bad = [col for col in NUMERIC_COLUMNS if not _is_number(employee[col])]
+    if bad:
+        raise ValueError(f"Columns {bad} must be finite numbers")
+
+
+def check_employees(df):
+    """check_employee() for every row of a batch, naming the bad rows and columns"""
+    missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    bad = pd.DataFrame({col: ~df[col].map(_is_number).astype(bool) for col in NUMERIC_COLUMNS})
+    if bad.to_numpy().any():
+        rows = np.flatnonzero(bad.any(axis=1)).tolist()
+        columns = [col for col in NUMERIC_COLUMNS if bad[col].any()]
+        raise ValueError(f"Columns {columns} must be finite numbers; bad rows {rows[:20]}"
+                         f"{' ...' if len(rows) > 20 else ''}")
+
+
+class ScoringService:
+    """Holds the compiled model and answers scoring requests"""
+
+    def __init__(self):
+        self.cache = None
+        self.ready = threading.Event()
+
+    def load(self, warmup_file=DATA_FILE):
+        """Compile the model pickles once and warm the prediction cache"""
+        cache = PredictionCache(load_plan())
+        if warmup_file:
+            cache.warm_up(pd.read_csv(warmup_file))
+        self.cache = cache
+        self.ready.set()
+
+    def predict_one(self, employee):
+        check_employee(employee)
+        row = tuple(employee[col] for col in FEATURE_COLUMNS)
+        if normalize_inputs(employee) == row:
+            stay, leave = self.cache.predict(employee)
+        else:
+            # Off the UI grid the cache key would round or truncate the
+            # inputs, so score exactly what was sent, as /predict/batch does
+            leave = self.cache.plan.score_one(row)
+            stay = 1.0 - leave
+        return {'stay': stay, 'leave': leave, 'model_version': self.cache.plan.version}
+
+    def predict_batch(self, employees):
+        if not employees:
+            return {'predictions': [], 'model_version': self.cache.plan.version}
+        df = pd.DataFrame(employees)
+        check_employees(df)
+        plan = self.cache.plan
+        proba = plan.predict_proba(encode_features(df, plan.category_tables))
+        return {
+            'predictions': [{'stay': stay, 'leave': leave} for stay, leave in proba.tolist()],
+            'model_version': plan.version,
+        }
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['unknown_categories'] = {
+            col: {str(value): count for value, count in table.unknown.items()}
+            for col, table in self.cache.plan.category_tables.items()
+        }
+        return stats
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; with Nagle on, keep-alive
+    # clients wait out a delayed ACK (~40ms) on every request
+    disable_nagle_algorithm = True
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif self.path == '/ready':
+            if self.service.ready.is_set():
+                self.send_json(200, {'status': 'ready',
+                                     'model_version': self.service.cache.plan.version})
+            else:
+                self.send_json(503, {'status': 'loading'})
+        elif self.path == '/stats':
+            if self.service.ready.is_set():
+                self.send_json(200, self.service.stats())
+            else:
+                self.send_json(503, {'error': 'Model is still loading'})
+        else:
+            self.send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            self.send_json(400, {'error': 'Request body is not valid JSON'})
+            return
+
+        if self.path not in ('/predict', '/predict/batch'):
+            self.send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        if not self.service.ready.is_set():
+            self.send_json(503, {'error': 'Model is still loading'})
+            return
+
+        try:
+            if self.path == '/predict':
+                if not isinstance(payload, dict):
+                    raise ValueError("Expected a JSON object for one employee")
+                result = self.service.predict_one(payload)
+            else:
+                if isinstance(payload, dict):
+                    payload = payload.get('employees')
+                if not isinstance(payload, list):
+                    raise ValueError("Expected a JSON list of employees")
+                result = self.service.predict_batch(payload)
+        except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        self.send_json(200, result)
+
+
+def make_server(host=SERVER_HOST, port=SERVER_PORT, service=None):
+    """Create the HTTP server; call service.load() to make it ready"""
+    handler = type('BoundScoringHandler', (ScoringHandler,),
+                   {'service': service or ScoringService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve churn predictions over HTTP")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--warmup-file', default=DATA_FILE,
+                        help="CSV whose common rows pre-fill the cache ('' to skip)")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    service = server.RequestHandlerClass.service
+    threading.Thread(target=service.load, args=(args.warmup_file,), daemon=True).start()
+    print(f"Scoring service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Bounded-memory streaming scorer for large employee CSV extracts
+
+Usage:
+    python stream_scorer.py extract.csv scores.csv --chunk-size 250000 --keep employee_id
+"""
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from config import FEATURE_COLUMNS, STREAM_CHUNK_SIZE
+from scoring import load_plan
+
+
+def stream_score(input_path, output_path, chunk_size=STREAM_CHUNK_SIZE,
+                 keep_columns=(), plan=None, decimals=6, progress=None):
+    """Score input_path chunk by chunk and append the results to output_path
+
+    Only one chunk is held in memory at a time, so peak memory depends on
+    chunk_size and not on the size of the input. keep_columns are copied
+    through to the output next to the stay/leave probabilities, which are
+    rounded to `decimals` places (None keeps full precision). Returns
+    (rows scored, elapsed seconds).
+    """
+    plan = plan or load_plan()
+    keep_columns = list(keep_columns)
+    usecols = list(dict.fromkeys(keep_columns + FEATURE_COLUMNS))
+
+    start = time.perf_counter()
+    rows = 0
+    reader = pd.read_csv(input_path, usecols=usecols, chunksize=chunk_size)
+    for i, chunk in enumerate(reader):
+        proba = plan.score(chunk)
+        if decimals is not None:
+            # Rounding first keeps to_csv on its fast repr path, which beats
+            # a printf-style float_format on every value
+            proba = proba.round(decimals)
+        out = chunk[keep_columns].copy()
+        out['stay_probability'] = proba[:, 0]
+        out['leave_probability'] = proba[:, 1]
+        out.to_csv(output_path, mode='w' if i == 0 else 'a', header=i == 0,
+                   index=False)
+
+        rows += len(chunk)
+        if progress:
+            progress(rows, time.perf_counter() - start)
+
+    if rows == 0:
+        pd.DataFrame(columns=keep_columns + ['stay_probability', 'leave_probability']) \
+            .to_csv(output_path, index=False)
+    return rows, time.perf_counter() - start
+
+
+def print_progress(rows, seconds):
+    print(f"\r📈 {rows:,} rows scored  ({rows / max(seconds, 1e-9):,.0f} rows/s)",
+          end='', file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream-score a large employee CSV")
+    parser.add_argument('input', help="CSV with the HR_comma_sep.csv feature columns")
+    parser.add_argument('output', help="CSV to write the probabilities to")
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE)
+    parser.add_argument('--keep', nargs='*', default=[],
+                        help="Input columns to copy through, e.g. an employee id")
+    parser.add_argument('--quiet', action='store_true', help="No progress output")
+    args = parser.parse_args()
+
+    rows, seconds = stream_score(args.input, args.output, args.chunk_size, args.keep,
+                                 progress=None if args.quiet else print_progress)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"✅ Scored {rows:,} rows in {seconds:.1f}s "
+          f"({rows / max(seconds, 1e-9):,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,43 @@
 Test script for Employee Churn Prediction Application
 """
 
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+
 import pandas as pd
 import joblib
 import numpy as np
+from sklearn.preprocessing import StandardScaler
 from config import *
+from scoring import (load_artifacts, score_batch, ScoringPlan, compile_category_tables,
+                     PredictionCache, load_plan, encode_features)
+from server import make_server
+from microbatch import MicroBatcher
+from parallel import ParallelScorer
+from stream_scorer import stream_score
+from LoadDB import CSVToSQLite
+import model_bundle
+from model_bundle import export_bundle, load_bundle, write_bundle
+from sensitivity import sensitivity_sweep
+from ranking import RiskRanking
+from train import StageCache, build_stages, split_stage, train, train_artifacts
+from search import candidates, search, best_params
+from compare_models import compare
+from refresh import init_checkpoint, refresh
+from feature_stats import FeatureStats, shard_stats
+from tree_model import TreeEnsemblePlan, train_trees, export_tree_bundle, validate_tree_arrays
+from train_sgd import iter_chunks, train_out_of_core
+from risk_bands import BANDS, assign_bands, population_bands
+from contributions import (data_version, employee_contributions, population_contributions,
+                           top_drivers, department_drivers)
 
 def test_data_loading():
     """Test if data file can be loaded"""
@@ -65,6 +98,586 @@ def test_prediction():
         print(f"❌ Error in prediction: {e}")
         return False
 
+def test_score_batch():
+    """Test vectorized batch scoring against the sklearn pipeline"""
+    model, scaler, label_encoders = load_artifacts()
+    data = pd.read_csv(DATA_FILE)
+
+    expected_input = data[FEATURE_COLUMNS].rename(columns=MODEL_COLUMN_NAMES)
+    for col in CATEGORICAL_COLUMNS:
+        expected_input[col] = label_encoders[col].transform(expected_input[col])
+    expected = model.predict_proba(scaler.transform(expected_input))
+
+    proba = score_batch(data, model, scaler, label_encoders)
+    assert proba.shape == (len(data), 2)
+    assert np.allclose(proba, expected)
+    print(f"✅ Batch scoring matches sklearn on {len(data)} rows")
+    return True
+
+def test_scoring_plan_parity():
+    """Test the fused scoring plan against scaler.transform + predict_proba"""
+    model, scaler, label_encoders = load_artifacts()
+    plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1000, len(FEATURE_COLUMNS))) * scaler.scale_ * 10 + scaler.mean_
+    expected = model.predict_proba((X - scaler.mean_) / scaler.scale_)
+
+    assert np.allclose(plan.predict_proba(X), expected, rtol=0, atol=1e-12)
+    print("✅ Scoring plan matches the sklearn path")
+    return True
+
+def test_category_tables():
+    """Test category tables against LabelEncoder and unknown-value fallback"""
+    _, _, label_encoders = load_artifacts()
+    tables = compile_category_tables(label_encoders)
+    data = pd.read_csv(DATA_FILE)
+
+    for col in CATEGORICAL_COLUMNS:
+        expected = label_encoders[col].transform(data[col])
+        assert np.array_equal(tables[col].encode(data[col]), expected)
+        assert tables[col].unknown_count == 0
+
+    departments = tables['Department']
+    codes = departments.encode(['sales', 'legal', 'legal', None, 'IT'])
+    fallback = departments.fallback_code
+    assert list(codes) == [departments.codes['sales'], fallback, fallback,
+                           fallback, departments.codes['IT']]
+    assert departments.unknown == {'legal': 2, None: 1}
+    print("✅ Category tables match LabelEncoder and count unknowns")
+    return True
+
+def test_prediction_cache():
+    """Test the LRU prediction cache, its counters and model scoping"""
+    model, scaler, label_encoders = load_artifacts()
+    plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+    data = pd.read_csv(DATA_FILE)
+    cache = PredictionCache(plan, maxsize=100)
+
+    row = data[FEATURE_COLUMNS].iloc[0].to_dict()
+    stay, leave = cache.predict(row)
+    assert np.isclose(leave, plan.score(data.iloc[:1])[0, 1])
+    assert np.isclose(stay + leave, 1.0)
+    assert cache.predict(row) == (stay, leave)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    assert cache.warm_up(data, top_n=500) == 500
+    assert len(cache) == 100
+
+    retrained = ScoringPlan(plan.coef * 2, plan.intercept, plan.category_tables)
+    cache.set_plan(retrained)
+    assert len(cache) == 0
+    print(f"✅ Prediction cache working: {cache.stats()}")
+    return True
+
+def test_scoring_service():
+    """Test the HTTP scoring service readiness, single and batch endpoints"""
+    server = make_server(port=0)
+    service = server.RequestHandlerClass.service
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def request(path, payload=None):
+        data = None if payload is None else json.dumps(payload).encode()
+        try:
+            with urllib.request.urlopen(url + path, data) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    try:
+        assert request('/health')[0] == 200
+        assert request('/ready')[0] == 503
+        assert request('/stats')[0] == 503
+        service.load(warmup_file=None)
+        assert request('/ready')[0] == 200
+
+        data = pd.read_csv(DATA_FILE).head(5)
+        employees = json.loads(data[FEATURE_COLUMNS].to_json(orient='records'))
+        expected = score_batch(data)
+
+        status, single = request('/predict', employees[0])
+        assert status == 200 and np.isclose(single['leave'], expected[0, 1])
+        status, batch = request('/predict/batch', {'employees': employees})
+        assert status == 200
+        assert np.allclose([p['leave'] for p in batch['predictions']], expected[:, 1])
+        assert request('/predict', {'salary': 'low'})[0] == 400
+
+        # Off the UI grid, /predict must score the values as sent, like the batch
+        off_grid = {**employees[0], 'satisfaction_level': 0.555, 'number_project': 2.9,
+                    'average_montly_hours': 157.9}
+        expected_leave = score_batch(pd.DataFrame([off_grid]))[0, 1]
+        status, single = request('/predict', off_grid)
+        assert status == 200 and np.isclose(single['leave'], expected_leave)
+        status, batch = request('/predict/batch', [off_grid])
+        assert status == 200 and np.isclose(batch['predictions'][0]['leave'], expected_leave)
+
+        status, error = request('/predict/batch', [employees[0], {**employees[1],
+                                                                  'last_evaluation': None}])
+        assert status == 400 and 'last_evaluation' in error['error'] and '[1]' in error['error']
+
+        # Both endpoints apply the same rule: numbers only, and finite
+        for bad in ({'number_project': float('inf')}, {'satisfaction_level': '0.5'}):
+            employee = {**employees[0], **bad}
+            status, error = request('/predict', employee)
+            assert status == 400 and list(bad)[0] in error['error']
+            status, error = request('/predict/batch', [employees[1], employee])
+            assert status == 400 and list(bad)[0] in error['error'] and '[1]' in error['error']
+        assert request('/stats')[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("✅ Scoring service answers single and batch requests")
+    return True
+
+def test_microbatcher():
+    """Test that concurrent predictions are coalesced and answered in order"""
+    model, scaler, label_encoders = load_artifacts()
+    data = pd.read_csv(DATA_FILE).head(200)
+    # An off-grid employee must be scored as sent, not rounded to the UI grid
+    data = data.astype({'number_project': float, 'average_montly_hours': float})
+    data.loc[0, ['satisfaction_level', 'number_project', 'average_montly_hours']] = \
+        [0.555, 2.9, 157.9]
+    expected = score_batch(data)[:, 1]
+
+    async def run():
+        batcher = MicroBatcher.from_artifacts(model, scaler, label_encoders,
+                                              max_wait_ms=50, max_batch_size=64)
+        employees = data[FEATURE_COLUMNS].to_dict('records')
+        results = await asyncio.gather(*(batcher.predict(e) for e in employees))
+        await batcher.close()
+        return results, batcher.metrics.snapshot()
+
+    async def run_with_bad_row():
+        batcher = MicroBatcher.from_artifacts(model, scaler, label_encoders, max_wait_ms=50)
+        employees = data[FEATURE_COLUMNS].head(5).to_dict('records')
+        employees.append({**employees[0], 'satisfaction_level': 'oops'})
+        results = await asyncio.gather(*(batcher.predict(e) for e in employees),
+                                       return_exceptions=True)
+        await batcher.close()
+        return results
+
+    results, metrics = asyncio.run(run())
+    assert np.allclose([leave for _, leave in results], expected)
+    assert metrics['rows'] == len(data)
+    # A malformed employee fails only its own request
+    *good, bad = asyncio.run(run_with_bad_row())
+    assert isinstance(bad, ValueError)
+    assert np.allclose([leave for _, leave in good], expected[:5])
+    assert metrics['batches'] < len(data) and metrics['max_batch_size'] == 64
+    print(f"✅ Micro-batcher coalesced requests: {metrics}")
+    return True
+
+def test_parallel_scoring():
+    """Test multi-process file scoring against score_batch, in input order"""
+    data = pd.read_csv(DATA_FILE)
+    expected = score_batch(data)
+
+    with ParallelScorer(workers=2) as scorer:
+        proba = scorer.score_file(DATA_FILE, ranges_per_worker=3)
+    assert proba.shape == expected.shape
+    assert np.allclose(proba, expected)
+    print(f"✅ Parallel scoring matches score_batch on {len(data)} rows")
+    return True
+
+def test_stream_scoring():
+    """Test chunked CSV scoring against score_batch"""
+    data = pd.read_csv(DATA_FILE)
+    expected = score_batch(data)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'scores.csv')
+        rows, _ = stream_score(DATA_FILE, output, chunk_size=4000,
+                               keep_columns=['left'], decimals=None)
+        scores = pd.read_csv(output)
+    assert rows == len(data) == len(scores)
+    assert list(scores.columns) == ['left', 'stay_probability', 'leave_probability']
+    assert (scores['left'] == data['left']).all()
+    assert np.allclose(scores[['stay_probability', 'leave_probability']], expected)
+    print(f"✅ Streaming scorer wrote {rows} rows in chunks")
+    return True
+
+def test_sqlite_scoring():
+    """Test the churn_proba SQL function and materialized score table"""
+    data = pd.read_csv(DATA_FILE)
+    expected = score_batch(data)[:, 1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = CSVToSQLite(os.path.join(tmp, 'churn.db'))
+        db.save_to_db(data, DB_TABLE)
+
+        conn = db.connect()
+        args = ', '.join(FEATURE_COLUMNS)
+        top = conn.execute(f"SELECT rowid, churn_proba({args}) AS p FROM {DB_TABLE} "
+                           "ORDER BY p DESC LIMIT 5").fetchall()
+        conn.close()
+        assert np.allclose([p for _, p in top], np.sort(expected)[::-1][:5])
+        assert np.allclose([expected[rowid - 1] for rowid, _ in top], [p for _, p in top])
+
+        assert db.materialize_scores(batch_size=4000) == len(data)
+        conn = sqlite3.connect(db.db_name)
+        scores = pd.read_sql_query(f"SELECT * FROM {SCORES_TABLE} ORDER BY employee_rowid", conn)
+        conn.close()
+    assert np.allclose(scores['leave_probability'], expected)
+    print(f"✅ In-database scoring matches score_batch on {len(data)} rows")
+    return True
+
+def test_model_bundle():
+    """Test the pickle-free bundle against the sklearn path"""
+    model, scaler, label_encoders = load_artifacts()
+    data = pd.read_csv(DATA_FILE)
+
+    expected_input = data[FEATURE_COLUMNS].rename(columns=MODEL_COLUMN_NAMES)
+    for col in CATEGORICAL_COLUMNS:
+        expected_input[col] = label_encoders[col].transform(expected_input[col])
+    expected = model.predict_proba(scaler.transform(expected_input))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_bundle(model, scaler, label_encoders, os.path.join(tmp, 'model.npz'))
+        plan = load_bundle(path)
+        assert np.allclose(plan.score(data), expected)
+        X = plan.schema.to_matrix(expected_input.assign(**data[CATEGORICAL_COLUMNS]), plan)
+        assert np.allclose(plan.predict_proba(X), expected)
+
+        check = ("import sys, model_bundle; model_bundle.load_bundle(sys.argv[1]); "
+                 "print(sorted(m for m in ('sklearn', 'joblib', 'pandas') if m in sys.modules))")
+        loaded = subprocess.run([sys.executable, '-c', check, path], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    assert loaded == '[]', loaded
+    print("✅ Model bundle matches sklearn and loads with NumPy only")
+    return True
+
+def test_model_bundle_validation():
+    """Test that a tampered or mismatched bundle is rejected at load"""
+    model, scaler, label_encoders = load_artifacts()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_bundle(model, scaler, label_encoders, os.path.join(tmp, 'model.npz'))
+        with np.load(path) as bundle:
+            arrays = dict(bundle)
+        arrays['coef'] = arrays['coef'] * 2
+        tampered = os.path.join(tmp, 'tampered.npz')
+        np.savez(tampered, **arrays)
+
+        try:
+            load_bundle(tampered)
+        except ValueError as e:
+            assert 'content hash' in str(e)
+        else:
+            raise AssertionError("Tampered bundle was accepted")
+
+        # An intact bundle whose recorded dtypes disagree with this code's schema
+        with np.load(path) as bundle:
+            arrays = dict(bundle)
+        manifest = json.loads(str(arrays.pop('manifest')))
+        del manifest['content_hash']
+        manifest['features'][FEATURE_COLUMNS.index('number_project')]['dtype'] = 'float64'
+        manifest['content_hash'] = model_bundle._content_hash(manifest, arrays)
+        mismatched = os.path.join(tmp, 'mismatched.npz')
+        np.savez(mismatched, manifest=np.array(json.dumps(manifest)), **arrays)
+        try:
+            load_bundle(mismatched)
+        except ValueError as e:
+            assert 'dtypes' in str(e) and 'number_project' in str(e)
+        else:
+            raise AssertionError("Bundle with mismatched dtypes was accepted")
+    print("✅ Model bundle rejects tampered content")
+    return True
+
+def test_contributions():
+    """Test that contributions add up to the model's log-odds"""
+    model, scaler, label_encoders = load_artifacts()
+    plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+    data = pd.read_csv(DATA_FILE)
+
+    contributions = population_contributions(data, plan)
+    assert population_contributions(data, plan) is contributions
+    # A version computed once at load time reaches the same cache entry
+    assert population_contributions(data, plan, data_version(data)) is contributions
+    leave = score_batch(data)[:, 1]
+    log_odds = contributions.sum(axis=1) + model.intercept_[0]
+    assert np.allclose(log_odds, np.log(leave / (1 - leave)))
+
+    single = employee_contributions(plan, data[FEATURE_COLUMNS].iloc[7].to_dict())
+    assert np.allclose(single, contributions.iloc[7])
+
+    drivers = top_drivers(contributions)
+    assert drivers.iloc[7, 0] == contributions.iloc[7].idxmax()
+    assert len(department_drivers(data, contributions)) == data['Department'].nunique()
+    print("✅ Contributions add up to the model's log-odds")
+    return True
+
+def test_sensitivity_sweep():
+    """Test that every sweep point matches scoring that profile on its own"""
+    model, scaler, label_encoders = load_artifacts()
+    plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+    employee = pd.read_csv(DATA_FILE)[FEATURE_COLUMNS].iloc[0].to_dict()
+
+    curves = sensitivity_sweep(plan, employee)
+    assert list(curves) == list(FEATURE_RANGES)
+    assert len(curves['satisfaction_level']) == 101
+    for col, curve in curves.items():
+        for value, leave in curve.sample(3, random_state=0).itertuples(index=False):
+            assert np.isclose(plan.score_one(tuple({**employee, col: value}.values())), leave)
+    # Each slider's default is a sweep point, so the current-value marker sits on the curve
+    for col, (_, _, default, _) in FEATURE_RANGES.items():
+        assert np.isclose(curves[col]['value'], default).any()
+    print(f"✅ Sensitivity sweep scored {sum(map(len, curves.values()))} points in one batch")
+    return True
+
+def test_risk_ranking():
+    """Test that top-K rankings match a full sort, before and after updates"""
+    model, scaler, label_encoders = load_artifacts()
+    plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+    data = pd.read_csv(DATA_FILE)
+    ranking = RiskRanking(plan, data, k=25)
+
+    def check(df):
+        leave = plan.score(df)[:, 1]
+        expected = np.sort(leave)[::-1][:25]
+        assert np.allclose(ranking.top()['leave_probability'], expected)
+        for dept in ranking.groups('Department'):
+            group = np.sort(leave[(df['Department'] == dept).to_numpy()])[::-1][:25]
+            assert np.allclose(ranking.top('Department', dept)['leave_probability'], group)
+
+    check(data)
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        # Move some top employees elsewhere and make others less likely to leave
+        rows = np.concatenate([ranking.top()['row'][:5], rng.choice(len(data), 50)])
+        rows = np.unique(rows)
+        data.loc[rows, 'satisfaction_level'] = rng.uniform(0, 1, len(rows))
+        data.loc[rows, 'Department'] = rng.choice(DEPARTMENTS, len(rows))
+        ranking.update(rows, data.iloc[rows])
+        check(data)
+    print("✅ Top-K rankings match a full sort after incremental updates")
+    return True
+
+def test_risk_bands():
+    """Test that population bands follow PREDICTION_THRESHOLDS and are cached"""
+    model, scaler, label_encoders = load_artifacts()
+    plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+    data = pd.read_csv(DATA_FILE)
+
+    assert [BANDS[c] for c in assign_bands([0.9, 0.7, 0.6, 0.5, 0.1])] == \
+        ['high_retention', 'moderate_risk', 'moderate_risk', 'high_risk', 'high_risk']
+
+    counts, histogram = population_bands(data, plan)
+    assert population_bands(data, plan)[0] is counts
+    assert population_bands(data, plan, df_version=data_version(data))[0] is counts
+    stay = score_batch(data)[:, 0]
+    assert counts['high_retention'] == (stay > PREDICTION_THRESHOLDS['high_retention']).sum()
+    assert counts['high_risk'] == (stay <= PREDICTION_THRESHOLDS['moderate_risk']).sum()
+    assert counts.sum() == histogram['employees'].sum() == len(data)
+    print(f"✅ Risk bands: {counts.to_dict()}")
+    return True
+
+def test_training_pipeline():
+    """Test that training reproduces the model and caches every stage"""
+    model, _, _ = load_artifacts()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'cache')
+        trained, metrics, ran = train(output_dir=tmp, cache_dir=cache_dir, log=lambda msg: None)
+        assert ran == ['load', 'encode', 'split', 'scale', 'fit', 'export']
+        assert np.allclose(trained.coef_, model.coef_)
+        assert load_bundle(os.path.join(tmp, BUNDLE_FILE)).version
+
+        assert train(output_dir=tmp, cache_dir=cache_dir, log=lambda msg: None)[2] == []
+        _, _, ran = train(output_dir=tmp, params={'C': 0.1}, cache_dir=cache_dir,
+                          log=lambda msg: None)
+        assert ran == ['fit', 'export']
+    print(f"✅ Training pipeline: accuracy {metrics['accuracy']:.3f}, "
+          f"ROC-AUC {metrics['roc_auc']:.3f}; cached stages skipped")
+    return True
+
+def test_preprocessing_cache():
+    """Test that cached preprocessing is memory-mapped and matches a fresh run"""
+    quiet = lambda msg: None
+    fresh = build_stages(DATA_FILE, 0.2, 42, StageCache(None, quiet))['scale'][1]()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        build_stages(DATA_FILE, 0.2, 42, StageCache(cache_dir, quiet))['scale'][1]()
+        assert not any(name.endswith('.joblib') and not name.startswith('load')
+                       for name in os.listdir(cache_dir))
+        cache = StageCache(cache_dir, quiet)
+        stages = build_stages(DATA_FILE, 0.2, 42, cache)
+        cached = stages['scale'][1]()
+        encoded = stages['encode'][1]()
+        assert cache.ran == []
+        assert isinstance(cached['X_train'], np.memmap) and isinstance(encoded['X'], np.memmap)
+        for name in ('X_train', 'X_test', 'y_train', 'y_test', 'scaler_mean', 'scaler_scale'):
+            assert np.array_equal(cached[name], fresh[name]), name
+        X_test = pd.DataFrame(encoded['X'][stages['split'][1]()[1]],
+                              columns=list(cached['scaler'].feature_names_in_))
+        assert np.allclose(cached['scaler'].transform(X_test), fresh['X_test'])
+        assert list(cached['label_encoders']['salary'].transform(['low', 'high'])) == [1, 0]
+        del cached, encoded, stages
+    print("✅ Preprocessing cache: memory-mapped and identical to a fresh run")
+    return True
+
+def test_out_of_core_training():
+    """Test that chunked SGD training from CSV or SQLite gives a usable model"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'churn.db')
+        with sqlite3.connect(db_file) as conn:
+            pd.read_csv(DATA_FILE).to_sql(DB_TABLE, conn, index=False)
+
+        results = [train_out_of_core(lambda: iter_chunks(DATA_FILE, chunk_size=4000),
+                                     epochs=3, log=lambda msg: None),
+                   train_out_of_core(lambda: iter_chunks(db_file=db_file, chunk_size=4000),
+                                     epochs=3, log=lambda msg: None)]
+    for model, scaler, label_encoders, metrics in results:
+        assert 0.15 < metrics['rows'] / (metrics['rows'] + metrics['train_rows']) < 0.25
+        assert metrics['roc_auc'] > 0.75
+        plan = ScoringPlan.from_artifacts(model, scaler, label_encoders)
+        assert plan.score(pd.read_csv(DATA_FILE).head(5)).shape == (5, 2)
+    # Both sources hold the same rows, so the hash split picks the same test set
+    assert results[0][3]['rows'] == results[1][3]['rows']
+    assert np.allclose(results[0][1].mean_, results[1][1].mean_)
+    print(f"✅ Out-of-core training: ROC-AUC {results[0][3]['roc_auc']:.3f}")
+    return True
+
+def test_hyperparameter_search():
+    """Test that the search ranks every valid candidate and caches its folds"""
+    grid = {'C': [0.1, 1.0], 'penalty': ['l1', 'l2'], 'solver': ['lbfgs', 'liblinear'],
+            'class_weight': [None]}
+    assert len(candidates(grid)) == 6   # lbfgs does not support l1
+    with tempfile.TemporaryDirectory() as cache_dir:
+        messages = []
+        leaderboard = search(grid=grid, n_folds=3, workers=2, cache_dir=cache_dir,
+                             log=messages.append)
+        assert any(msg.startswith('⚙️  folds') for msg in messages)
+        messages.clear()
+        search(grid=grid, n_folds=3, workers=2, cache_dir=cache_dir, log=messages.append)
+        assert any(msg.startswith('⏭️  folds') for msg in messages)
+    assert len(leaderboard) == 6
+    assert leaderboard['roc_auc'].is_monotonic_decreasing
+    params = best_params(leaderboard)
+    assert params['class_weight'] is None and params['penalty'] in ('l1', 'l2')
+    # Parameters come from the leaderboard, not the default SEARCH_GRID
+    custom = pd.DataFrame({'C': [0.5], 'tol': [1e-3], 'roc_auc': [0.8], 'roc_auc_std': [0.01],
+                           'accuracy': [0.7], 'fit_seconds': [0.1]})
+    params = best_params(custom)
+    assert params['C'] == 0.5 and params['tol'] == 1e-3 and 'roc_auc' not in params
+    print(f"✅ Hyperparameter search: best ROC-AUC {leaderboard['roc_auc'].iloc[0]:.3f}")
+    return True
+
+def test_tree_model():
+    """Test that the array tree predictor matches scikit-learn and loads as a plan"""
+    data = pd.read_csv(DATA_FILE)
+    with tempfile.TemporaryDirectory() as tmp:
+        model, label_encoders, metrics = train_trees(
+            params={'n_estimators': 20, 'max_depth': 4}, cache_dir=os.path.join(tmp, 'cache'),
+            log=lambda msg: None)
+        path = export_tree_bundle(model, label_encoders, os.path.join(tmp, 'trees.npz'))
+        plan = load_plan(path)
+    assert isinstance(plan, TreeEnsemblePlan) and plan.content_hash
+
+    X = encode_features(data, plan.category_tables)
+    assert np.allclose(plan.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    rows = data[FEATURE_COLUMNS].head(50).itertuples(index=False)
+    assert np.allclose([plan.score_one(tuple(row)) for row in rows],
+                       model.predict_proba(X[:50])[:, 1])
+    contributions = plan.contributions(X)
+    assert np.allclose(contributions.sum(axis=1) + plan.expected_value,
+                       plan.decision_function(X))
+    assert PredictionCache(plan).predict(data.iloc[0].to_dict())[1] == plan.score_one(
+        tuple(data[FEATURE_COLUMNS].iloc[0]))
+
+    # A split whose left child loops back to itself would never reach a leaf
+    arrays = plan.to_arrays()
+    arrays['left'] = arrays['left'].copy()
+    arrays['left'][0] = 0
+    try:
+        validate_tree_arrays(arrays, len(FEATURE_COLUMNS))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Malformed trees were accepted")
+    print(f"✅ Tree model matches scikit-learn: test ROC-AUC {metrics['roc_auc']:.3f}")
+    return True
+
+def test_model_comparison():
+    """Test that the comparison harness measures every candidate from its bundle"""
+    with tempfile.TemporaryDirectory() as tmp:
+        table = compare(['logistic', 'sgd'], batch_rows=2_000,
+                        cache_dir=os.path.join(tmp, 'cache'), log=lambda msg: None)
+    assert list(table.index) == ['logistic', 'sgd']
+    assert list(table.columns) == ['roc_auc', 'p50_us', 'p99_us', 'rows_per_s',
+                                   'base_rss_mb', 'model_peak_mb', 'bundle_kb']
+    assert (table['roc_auc'] > 0.75).all()
+    assert (table['p50_us'] <= table['p99_us']).all()
+    assert (table[['rows_per_s', 'bundle_kb']] > 0).all().all()
+    # Memory is NaN where the platform cannot reset the peak RSS watermark
+    memory = table[['base_rss_mb', 'model_peak_mb']]
+    assert ((memory > 0) | memory.isna()).all().all()
+    print(f"✅ Compared {len(table)} models: ROC-AUC {table['roc_auc'].round(3).tolist()}")
+    return True
+
+def test_incremental_refresh():
+    """Test that a refresh from new Churn.db rows tracks a full retrain"""
+    data = pd.read_csv(DATA_FILE).sample(frac=1, random_state=0).reset_index(drop=True)
+    old, new = data.iloc[:9000], data.iloc[9000:]
+    quiet = lambda msg: None
+    with tempfile.TemporaryDirectory() as tmp:
+        old_csv, db = os.path.join(tmp, 'old.csv'), os.path.join(tmp, 'churn.db')
+        checkpoint, deployed = os.path.join(tmp, 'checkpoint.json'), os.path.join(tmp, 'model.npz')
+        old.to_csv(old_csv, index=False)
+        with sqlite3.connect(db) as conn:
+            old.to_sql(DB_TABLE, conn, index=False)
+        init_checkpoint(old_csv, db, test_size=0.01, cache_dir=None,
+                        checkpoint=checkpoint, log=quiet)
+        assert refresh(db, checkpoint, os.path.join(tmp, 'models'), deployed, log=quiet) is None
+
+        with sqlite3.connect(db) as conn:
+            new.to_sql(DB_TABLE, conn, index=False, if_exists='append')
+        state = refresh(db, checkpoint, os.path.join(tmp, 'models'), deployed, log=quiet)
+        assert state['version'] == 1 and state['last_rowid'] == len(data)
+        assert load_plan(deployed).content_hash == load_plan(state['bundle']).content_hash
+        plan = load_plan(deployed)
+
+        # Retrain from scratch on the rows the refreshed model has seen
+        train_rows = split_stage(np.arange(len(old)), 0.01, 42)[0]
+        all_csv = os.path.join(tmp, 'all.csv')
+        pd.concat([old.iloc[train_rows], new]).to_csv(all_csv, index=False)
+        full = ScoringPlan.from_artifacts(*train_artifacts(all_csv, test_size=1, cache_dir=None,
+                                                           log=quiet))
+    gap = np.abs(plan.score(data)[:, 1] - full.score(data)[:, 1]).max()
+    assert gap < 0.01, gap
+    print(f"✅ Refreshed model is within {gap:.4f} of a full retrain")
+    return True
+
+def test_feature_stats():
+    """Test that chunked and sharded statistics match StandardScaler on all rows"""
+    data = pd.read_csv(DATA_FILE)
+    model, scaler, label_encoders = load_artifacts()
+    X = encode_features(data, compile_category_tables(label_encoders))
+    expected = StandardScaler().fit(X)
+
+    chunked = FeatureStats()
+    for chunk in np.array_split(X, 7):
+        chunked.update(chunk)
+    shards = [FeatureStats().update(part) for part in np.array_split(X[::-1], 3)]
+    merged = shards[2].merge(shards[0]).merge(shards[1])
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f'part-{i}.csv') for i in range(2)]
+        for path, part in zip(paths, np.array_split(np.arange(len(data)), 2)):
+            data.iloc[part].to_csv(path, index=False)
+        from_files = shard_stats(paths, workers=2, chunk_size=3000)
+        bundle = write_bundle(model.coef_[0], model.intercept_[0], merged.mean, merged.scale,
+                              {col: label_encoders[col].classes_ for col in CATEGORICAL_COLUMNS},
+                              os.path.join(tmp, 'model.npz'))
+        plan = load_bundle(bundle)
+
+    for stats in (chunked, merged, from_files):
+        assert stats.count == len(X)
+        assert np.allclose(stats.mean, expected.mean_, rtol=1e-12)
+        assert np.allclose(stats.var, expected.var_, rtol=1e-12)
+    assert np.allclose(merged.to_scaler().transform(X), expected.transform(X))
+    fitted = ScoringPlan.from_artifacts(model, expected, label_encoders)
+    assert np.allclose(plan.score(data), fitted.score(data))
+    print(f"✅ Feature statistics: chunked, merged and sharded agree on {len(X)} rows")
+    return True
+
 def test_config():
     """Test configuration file"""
     try:
@@ -86,7 +699,30 @@ def main():
         ("Configuration", test_config),
         ("Data Loading", test_data_loading),
         ("Model Loading", test_model_loading),
-        ("Prediction", test_prediction)
+        ("Prediction", test_prediction),
+        ("Batch Scoring", test_score_batch),
+        ("Scoring Plan", test_scoring_plan_parity),
+        ("Category Tables", test_category_tables),
+        ("Prediction Cache", test_prediction_cache),
+        ("Scoring Service", test_scoring_service),
+        ("Micro-batching", test_microbatcher),
+        ("Parallel Scoring", test_parallel_scoring),
+        ("Streaming Scoring", test_stream_scoring),
+        ("SQLite Scoring", test_sqlite_scoring),
+        ("Model Bundle", test_model_bundle),
+        ("Model Bundle Validation", test_model_bundle_validation),
+        ("Contributions", test_contributions),
+        ("Sensitivity Sweep", test_sensitivity_sweep),
+        ("Risk Ranking", test_risk_ranking),
+        ("Risk Bands", test_risk_bands),
+        ("Training Pipeline", test_training_pipeline),
+        ("Preprocessing Cache", test_preprocessing_cache),
+        ("Out-of-core Training", test_out_of_core_training),
+        ("Hyperparameter Search", test_hyperparameter_search),
+        ("Tree Model", test_tree_model),
+        ("Model Comparison", test_model_comparison),
+        ("Incremental Refresh", test_incremental_refresh),
+        ("Feature Statistics", test_feature_stats)
     ]
     
     passed = 0
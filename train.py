@@ -1,54 +1,380 @@
+"""
+Training pipeline for Employee Churn Prediction
+
+Training runs as five stages: load, encode, split, scale and fit, followed
+by export. Each stage's output is cached under --cache-dir, keyed by a hash
+of its inputs: the data file's contents, the upstream stage's key and the
+stage's own parameters. Stages are evaluated lazily from the end. After a
+hyperparameter change, only fit (and export) run; the CSV is hashed but
+never parsed or preprocessed again.
+
+The preprocessing stages (encode, split and scale) are stored as plain .npy
+files: the encoded matrix, labels, split row positions, scaled splits and
+scaler statistics. On a cache hit they are memory-mapped read-only, so
+training, search, evaluation and the tests start from the cached matrix
+without parsing, copying or unpickling it.
+
+Usage:
+    python train.py                                  # HR_comma_sep.csv -> the .pkl files and bundle
+    python train.py --data extract.csv --C 0.5 --class-weight balanced
+    python train.py --output-dir models/ --no-cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
-import joblib
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from config import (DATA_FILE, MODEL_FILE, SCALER_FILE, LABEL_ENCODERS_FILE, BUNDLE_FILE,
+                    FEATURE_COLUMNS, CATEGORICAL_COLUMNS, TARGET_COLUMN,
+                    MODEL_COLUMN_NAMES, TRAIN_CACHE_DIR)
+from feature_stats import FeatureStats
+from model_bundle import export_bundle
+
+# Feature names the scaler was fitted under: the train.py aliases
+MODEL_FEATURE_NAMES = [MODEL_COLUMN_NAMES[col] for col in FEATURE_COLUMNS]
+
+# Bump when a stage's code changes in a way that changes its output, so
+# stale cache entries are never reused
+STAGE_VERSIONS = {'load': 1, 'encode': 2, 'split': 2, 'scale': 3, 'fit': 1, 'folds': 1,
+                  'trees': 1}
+
+DEFAULT_PARAMS = {'C': 1.0, 'solver': 'lbfgs', 'max_iter': 100, 'class_weight': None}
+
+
+def file_hash(path, block_size=1 << 20):
+    """Return the SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def stage_key(stage, *inputs):
+    """Return the cache key of a stage from its upstream keys and parameters"""
+    payload = json.dumps([stage, STAGE_VERSIONS[stage], *inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class StageCache:
+    """Stage outputs on disk, one entry per (stage, key)
+
+    run() stores an output as one joblib file. run_arrays(), used for the
+    encode, split and scale stages, stores it as a directory of .npy files
+    plus values.json, memory-mapped when read back.
+
+    Outputs are also kept in memory for the current run, so a stage used by
+    two downstream stages is loaded or computed once. With directory=None
+    nothing is read or written on disk.
+    """
+
+    def __init__(self, directory=TRAIN_CACHE_DIR, log=print):
+        self.directory = directory
+        self.log = log
+        self.ran = []
+        self.outputs = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, stage, key, suffix='.joblib'):
+        return os.path.join(self.directory, f'{stage}-{key[:16]}{suffix}')
+
+    def run(self, stage, key, compute):
+        """Return the cached output of stage for key, computing it on a miss"""
+        if key in self.outputs:
+            return self.outputs[key]
+        if self.directory and os.path.exists(self.path(stage, key)):
+            self.log(f"⏭️  {stage}: cached ({key[:12]})")
+            self.outputs[key] = joblib.load(self.path(stage, key))
+            return self.outputs[key]
+
+        self.log(f"⚙️  {stage}: running ({key[:12]})")
+        output = compute()
+        self.ran.append(stage)
+        if self.directory:
+            # Written to a temporary file and renamed, so an interrupted run
+            # never leaves a truncated entry behind
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            os.close(fd)
+            joblib.dump(output, tmp)
+            os.replace(tmp, self.path(stage, key))
+        self.outputs[key] = output
+        return output
+
+    def run_arrays(self, stage, key, compute):
+        """Like run() for outputs that are dicts of arrays and JSON values
+
+        Each array is stored as its own .npy file and memory-mapped
+        read-only on a hit; the other values go in one JSON file.
+        """
+        if key in self.outputs:
+            return self.outputs[key]
+        path = self.directory and self.path(stage, key, suffix='')
+        if path and os.path.isdir(path):
+            self.log(f"⏭️  {stage}: cached ({key[:12]})")
+            self.outputs[key] = load_arrays(path)
+            return self.outputs[key]
+
+        self.log(f"⚙️  {stage}: running ({key[:12]})")
+        output = compute()
+        self.ran.append(stage)
+        if path:
+            tmp = tempfile.mkdtemp(dir=self.directory, suffix='.tmp')
+            save_arrays(output, tmp)
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                # Another run stored the same entry first
+                shutil.rmtree(tmp)
+        self.outputs[key] = output
+        return output
+
+
+def save_arrays(output, directory):
+    """Write a dict's arrays as <name>.npy and its other values as values.json"""
+    values = {}
+    for name, value in output.items():
+        if isinstance(value, np.ndarray):
+            np.save(os.path.join(directory, f'{name}.npy'), value, allow_pickle=False)
+        else:
+            values[name] = value
+    with open(os.path.join(directory, 'values.json'), 'w') as f:
+        json.dump(values, f)
+
+
+def load_arrays(directory, mmap_mode='r'):
+    """Read a save_arrays() directory, memory-mapping every array"""
+    with open(os.path.join(directory, 'values.json')) as f:
+        output = json.load(f)
+    for name in os.listdir(directory):
+        if name.endswith('.npy'):
+            output[name[:-len('.npy')]] = np.load(os.path.join(directory, name),
+                                                  mmap_mode=mmap_mode, allow_pickle=False)
+    return output
+
+
+def label_encoders_from(vocabularies):
+    """Rebuild fitted LabelEncoders from their classes"""
+    label_encoders = {}
+    for col in CATEGORICAL_COLUMNS:
+        label_encoders[col] = LabelEncoder()
+        label_encoders[col].classes_ = np.array(vocabularies[col], dtype=object)
+    return label_encoders
+
+
+def scaler_from(prepared):
+    """Rebuild the fitted StandardScaler from the scale stage's statistics"""
+    stats = FeatureStats.from_moments(prepared['n_samples_seen'], prepared['scaler_mean'],
+                                      prepared['scaler_var'])
+    return stats.to_scaler(MODEL_FEATURE_NAMES)
+
+
+def load_stage(data_file):
+    """Read the feature and target columns of the training data"""
+    return pd.read_csv(data_file, usecols=FEATURE_COLUMNS + [TARGET_COLUMN])
+
+
+def encode_stage(df):
+    """Label-encode the categorical columns
+
+    Returns {'X': float matrix in FEATURE_COLUMNS order, 'y': labels,
+    'vocabularies': each categorical column's classes}.
+    """
+    X = df[FEATURE_COLUMNS].copy()
+    vocabularies = {}
+    for col in CATEGORICAL_COLUMNS:
+        encoder = LabelEncoder()
+        X[col] = encoder.fit_transform(X[col])
+        vocabularies[col] = [str(c) for c in encoder.classes_]
+    return {'X': X.to_numpy(dtype=np.float64), 'y': df[TARGET_COLUMN].to_numpy(dtype=np.int64),
+            'vocabularies': vocabularies}
+
+
+def split_stage(y, test_size, random_state):
+    """Return (train, test) row positions"""
+    return train_test_split(np.arange(len(y)), test_size=test_size, random_state=random_state)
+
+
+def scale_stage(encoded, train_rows, test_rows):
+    """Fit the scaler on the training rows and scale both splits
+
+    Returns everything fit and export need, so neither has to read the
+    encode stage again; the scaler is kept as its statistics (see
+    scaler_from).
+    """
+    X, y = encoded['X'], encoded['y']
+    stats = FeatureStats().update(X[train_rows])
+    return {
+        'X_train': stats.transform(X[train_rows]),
+        'X_test': stats.transform(X[test_rows]),
+        'y_train': y[train_rows],
+        'y_test': y[test_rows],
+        'scaler_mean': stats.mean,
+        'scaler_var': stats.var,
+        'scaler_scale': stats.scale,
+        'n_samples_seen': stats.count,
+        'vocabularies': encoded['vocabularies'],
+    }
+
+
+def fit_stage(prepared, params, random_state):
+    """Fit the classifier and evaluate it on the test split"""
+    model = LogisticRegression(random_state=random_state, **params)
+    model.fit(prepared['X_train'], prepared['y_train'])
+    leave = model.predict_proba(prepared['X_test'])[:, 1]
+    metrics = {'accuracy': float(accuracy_score(prepared['y_test'], leave >= 0.5)),
+               'roc_auc': float(roc_auc_score(prepared['y_test'], leave))}
+    return model, metrics
+
+
+def artifact_paths(output_dir):
+    """Return {artifact file name: path in output_dir}"""
+    return {name: os.path.join(output_dir, name)
+            for name in (MODEL_FILE, SCALER_FILE, LABEL_ENCODERS_FILE, BUNDLE_FILE)}
+
+
+def write_artifacts(model, scaler, label_encoders, output_dir):
+    """Write the .pkl artifacts load_artifacts() reads and the model bundle"""
+    paths = artifact_paths(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(model, paths[MODEL_FILE])
+    joblib.dump(scaler, paths[SCALER_FILE])
+    joblib.dump(label_encoders, paths[LABEL_ENCODERS_FILE])
+    export_bundle(model, scaler, label_encoders, paths[BUNDLE_FILE])
+    return paths
+
+
+def export_stage(model, prepared, output_dir, cache, key):
+    """Write the .pkl artifacts and the model bundle to output_dir
+
+    Skipped when the files in output_dir were written from the same fit
+    and are unchanged since. `prepared` is a thunk, only called when the
+    files are actually written.
+    """
+    paths = artifact_paths(output_dir)
+    marker = os.path.join(cache.directory, f'export-{key[:16]}.json') if cache.directory else None
+    if marker and os.path.exists(marker) and all(map(os.path.exists, paths.values())):
+        with open(marker) as f:
+            recorded = json.load(f)
+        if recorded == {name: file_hash(path) for name, path in paths.items()}:
+            cache.log(f"⏭️  export: {output_dir} is up to date")
+            return paths
+
+    cache.log(f"⚙️  export: writing to {output_dir}")
+    prepared = prepared()
+    write_artifacts(model, prepared['scaler'], prepared['label_encoders'], output_dir)
+    cache.ran.append('export')
+    if marker:
+        with open(marker, 'w') as f:
+            json.dump({name: file_hash(path) for name, path in paths.items()}, f)
+    return paths
+
+
+def build_stages(data_file, test_size, random_state, cache, data_hash=None):
+    """Wire up the preprocessing stages as lazily evaluated thunks
+
+    Returns {stage: (key, thunk)} for load, encode, split and scale; a
+    thunk runs (or loads) its stage, and upstream stages only if needed.
+    encode returns encode_stage()'s dict and split (train, test) row
+    positions. scale returns scale_stage()'s dict plus the rebuilt
+    'scaler' and 'label_encoders'.
+    """
+    load_key = stage_key('load', data_hash or file_hash(data_file))
+    load = lambda: cache.run('load', load_key, lambda: load_stage(data_file))
+
+    encode_key = stage_key('encode', load_key)
+    encode = lambda: cache.run_arrays('encode', encode_key, lambda: encode_stage(load()))
+
+    split_key = stage_key('split', encode_key, test_size, random_state)
+
+    def split():
+        rows = cache.run_arrays('split', split_key, lambda: dict(zip(
+            ('train_rows', 'test_rows'), split_stage(encode()['y'], test_size, random_state))))
+        return rows['train_rows'], rows['test_rows']
+
+    scale_key = stage_key('scale', encode_key, split_key)
+
+    def scale():
+        prepared = cache.run_arrays('scale', scale_key, lambda: scale_stage(encode(), *split()))
+        return {**prepared, 'scaler': scaler_from(prepared),
+                'label_encoders': label_encoders_from(prepared['vocabularies'])}
+
+    return {'load': (load_key, load), 'encode': (encode_key, encode),
+            'split': (split_key, split), 'scale': (scale_key, scale)}
+
+
+def _pipeline(data_file, params, test_size, random_state, cache, data_hash=None):
+    """Run fit on top of the stages; returns (fit key, model, metrics, prepared thunk)"""
+    scale_key, prepared = build_stages(data_file, test_size, random_state,
+                                       cache, data_hash)['scale']
+    fit_key = stage_key('fit', scale_key, params, random_state)
+    model, metrics = cache.run('fit', fit_key,
+                               lambda: fit_stage(prepared(), params, random_state))
+    return fit_key, model, metrics, prepared
+
+
+def train(data_file=DATA_FILE, output_dir='.', params=None, test_size=0.2,
+          random_state=42, cache_dir=TRAIN_CACHE_DIR, log=print):
+    """Run the pipeline, reusing every cached stage whose inputs are unchanged
+
+    Returns (model, metrics, stages run). Pass output_dir=None to skip export.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    cache = StageCache(cache_dir, log)
+    fit_key, model, metrics, prepared = _pipeline(data_file, params, test_size,
+                                                  random_state, cache)
+    if output_dir is not None:
+        export_stage(model, prepared, output_dir, cache, fit_key)
+    return model, metrics, cache.ran
+
+
+def train_artifacts(data_file=DATA_FILE, params=None, test_size=0.2, random_state=42,
+                    cache_dir=TRAIN_CACHE_DIR, data_hash=None, log=print):
+    """Return (model, scaler, label_encoders) from the pipeline without exporting
+
+    data_hash, when the caller already has the file's SHA-256, saves
+    hashing the file a second time.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    cache = StageCache(cache_dir, log)
+    _, model, _, prepared = _pipeline(data_file, params, test_size, random_state,
+                                      cache, data_hash)
+    prepared = prepared()
+    return model, prepared['scaler'], prepared['label_encoders']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the churn model")
+    parser.add_argument('--data', default=DATA_FILE, help="CSV with the HR_comma_sep.csv columns")
+    parser.add_argument('--output-dir', default='.', help="Where the artifacts are written")
+    parser.add_argument('--cache-dir', default=TRAIN_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true', help="Run every stage")
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--C', type=float, default=DEFAULT_PARAMS['C'])
+    parser.add_argument('--solver', default=DEFAULT_PARAMS['solver'])
+    parser.add_argument('--max-iter', type=int, default=DEFAULT_PARAMS['max_iter'])
+    parser.add_argument('--class-weight', choices=['balanced'], default=None)
+    args = parser.parse_args()
+
+    params = {'C': args.C, 'solver': args.solver, 'max_iter': args.max_iter,
+              'class_weight': args.class_weight}
+    _, metrics, ran = train(args.data, args.output_dir, params, args.test_size, args.seed,
+                            None if args.no_cache else args.cache_dir)
+    print(f"✅ Test accuracy {metrics['accuracy']:.3f}, ROC-AUC {metrics['roc_auc']:.3f} "
+          f"(stages run: {', '.join(ran) or 'none'})")
+
 
-# Load data
-file_path = "/Users/chandanmahato/Downloads/HR_comma_sep.csv"  # Ensure the correct file path
-df = pd.read_csv(file_path)
-
-# Rename columns (to match app.py)
-df = df.rename(columns={'satisfaction_level': 'satisfaction',
-                        'last_evaluation': 'evaluation',
-                        'number_project': 'projectCount',
-                        'average_montly_hours': 'averageMonthlyHours',
-                        'time_spend_company': 'yearsAtCompany',
-                        'Work_accident': 'workAccident',
-                        'promotion_last_5years': 'promotion',
-                        'sales': 'Department',
-                        'left': 'turnover'})
-
-# Define features (X) and target (y)
-X = df[['satisfaction', 'evaluation', 'projectCount', 'averageMonthlyHours',
-        'yearsAtCompany', 'workAccident', 'promotion', 'Department', 'salary']]
-y = df['left']
-
-# Encode categorical variables
-label_encoders = {}
-for col in ['Department', 'salary']:
-    label_encoders[col] = LabelEncoder()
-    X[col] = label_encoders[col].fit_transform(X[col].copy())
-
-# Split data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Standardize features
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# Train Logistic Regression Classifier
-logistic_classifier = LogisticRegression(random_state=42)
-logistic_classifier.fit(X_train_scaled, y_train)
-
-# Save model and preprocessing objects
-# Load the model in the original environment (where it was trained)
-model = joblib.load("logistic_regression_model.pkl")
-# Re-save it using scikit-learn 1.1.3
-joblib.dump(model, "logistic_regression_model_compatible.pkl")
-joblib.dump(logistic_classifier, 'logistic_regression_model.pkl')
-joblib.dump(scaler, 'scaler.pkl')
-joblib.dump(label_encoders, 'label_encoders.pkl')
-
-print("Model and preprocessors saved successfully!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Out-of-core training for Employee Churn Prediction
+
+For employee histories too large for one DataFrame. Rows are streamed in
+chunks from a CSV or from the Churn table in Churn.db, and only one chunk
+is held in memory at a time:
+
+    pass 1     feature statistics of the training rows (FeatureStats)
+    epochs     averaged SGD logistic regression, partial_fit on each shuffled chunk
+    last pass  evaluate on the test rows
+
+The train/test split is a hash of each row's contents, so it is the same
+on every pass and every run and needs no shuffled copy of the data.
+Identical rows always land in the same split. The category vocabularies
+are the fixed DEPARTMENTS and SALARY_LEVELS, so no pass is needed to
+discover them. The result is written in the same artifact formats as
+train.py.
+
+Usage:
+    python train_sgd.py --data history.csv --epochs 5
+    python train_sgd.py --db Churn.db --table Churn --output-dir models/churn
+
+Artifacts go to SGD_OUTPUT_DIR unless --output-dir says otherwise, so a
+run never overwrites the deployed model in the working directory.
+"""
+
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from config import (DATA_FILE, DB_TABLE, FEATURE_COLUMNS, CATEGORICAL_COLUMNS,
+                    TARGET_COLUMN, SGD_CHUNK_SIZE, SGD_EPOCHS, SGD_ALPHA,
+                    SGD_OUTPUT_DIR)
+from feature_stats import FeatureStats
+from scoring import CATEGORY_LEVELS, compile_category_tables, encode_features
+from train import write_artifacts
+
+SPLIT_BUCKETS = 10_000
+AUC_BINS = 10_000
+
+
+def iter_chunks(data_file=None, db_file=None, table=DB_TABLE, chunk_size=SGD_CHUNK_SIZE):
+    """Yield DataFrames of the feature and target columns, chunk_size rows each"""
+    columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+    if db_file is None:
+        yield from pd.read_csv(data_file, usecols=columns, chunksize=chunk_size)
+        return
+
+    select = ', '.join(f'"{col}"' for col in columns)
+    conn = sqlite3.connect(db_file)
+    try:
+        last_rowid = -1
+        while True:
+            chunk = pd.read_sql_query(
+                f'SELECT rowid AS source_rowid, {select} FROM "{table}" '
+                'WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                conn, params=(last_rowid, chunk_size))
+            if chunk.empty:
+                break
+            last_rowid = int(chunk['source_rowid'].iloc[-1])
+            yield chunk.drop(columns='source_rowid')
+    finally:
+        conn.close()
+
+
+def in_test_split(chunk, test_fraction, seed=42):
+    """Return a boolean array marking the chunk's test-split rows"""
+    hashes = pd.util.hash_pandas_object(chunk[FEATURE_COLUMNS + [TARGET_COLUMN]], index=False,
+                                        hash_key=f'{seed:016d}'[-16:]).to_numpy()
+    return hashes % SPLIT_BUCKETS < round(test_fraction * SPLIT_BUCKETS)
+
+
+def fixed_label_encoders():
+    """Return LabelEncoders fitted on the known category levels"""
+    return {col: LabelEncoder().fit(CATEGORY_LEVELS[col]) for col in CATEGORICAL_COLUMNS}
+
+
+class StreamingMetrics:
+    """Accuracy, log loss and binned ROC-AUC accumulated chunk by chunk"""
+
+    def __init__(self, bins=AUC_BINS):
+        self.bins = bins
+        self.rows = 0
+        self.correct = 0
+        self.log_loss_sum = 0.0
+        self.positives = np.zeros(bins, dtype=np.int64)
+        self.negatives = np.zeros(bins, dtype=np.int64)
+
+    def update(self, y, leave):
+        eps = 1e-15
+        self.rows += len(y)
+        self.correct += int(((leave >= 0.5) == (y == 1)).sum())
+        clipped = np.clip(leave, eps, 1 - eps)
+        self.log_loss_sum -= float(np.where(y == 1, np.log(clipped), np.log(1 - clipped)).sum())
+        bins = np.minimum((leave * self.bins).astype(np.intp), self.bins - 1)
+        self.positives += np.bincount(bins[y == 1], minlength=self.bins)
+        self.negatives += np.bincount(bins[y != 1], minlength=self.bins)
+
+    def roc_auc(self):
+        # P(score of a positive > score of a negative), ties within a bin
+        # counting one half
+        negatives_below = np.cumsum(self.negatives) - self.negatives
+        pairs = self.positives.sum() * self.negatives.sum()
+        if pairs == 0:
+            return float('nan')
+        return float((self.positives * (negatives_below + 0.5 * self.negatives)).sum() / pairs)
+
+    def result(self):
+        return {'rows': self.rows,
+                'accuracy': self.correct / max(self.rows, 1),
+                'log_loss': self.log_loss_sum / max(self.rows, 1),
+                'roc_auc': self.roc_auc()}
+
+
+def train_out_of_core(chunks, epochs=SGD_EPOCHS, alpha=SGD_ALPHA, test_fraction=0.2,
+                      seed=42, log=print):
+    """Fit scaler and SGD logistic regression over chunks() without loading it all
+
+    chunks is a callable returning a fresh iterator of DataFrames (see
+    iter_chunks); it is called once per pass. Returns (model, scaler,
+    label_encoders, metrics).
+    """
+    label_encoders = fixed_label_encoders()
+    tables = compile_category_tables(label_encoders)
+    rng = np.random.default_rng(seed)
+
+    def training_rows():
+        for chunk in chunks():
+            X = encode_features(chunk, tables)
+            train = ~in_test_split(chunk, test_fraction, seed)
+            yield X[train], chunk[TARGET_COLUMN].to_numpy()[train]
+
+    start = time.perf_counter()
+    stats = FeatureStats()
+    for X, _ in training_rows():
+        stats.update(X)
+    rows = stats.count
+    log(f"📏 scaler: {rows:,} training rows ({time.perf_counter() - start:.1f}s)")
+
+    # Averaged SGD: the weights served are the running mean of the iterates,
+    # which smooths out the noise of single-sample updates
+    model = SGDClassifier(loss='log_loss', alpha=alpha, average=True, random_state=seed)
+    for epoch in range(epochs):
+        for X, y in training_rows():
+            if len(X):
+                order = rng.permutation(len(X))
+                model.partial_fit(stats.transform(X[order]), y[order], classes=[0, 1])
+        log(f"🔁 epoch {epoch + 1}/{epochs} ({time.perf_counter() - start:.1f}s)")
+
+    metrics = StreamingMetrics()
+    for chunk in chunks():
+        test = in_test_split(chunk, test_fraction, seed)
+        if test.any():
+            X = stats.transform(encode_features(chunk[test], tables))
+            metrics.update(chunk[TARGET_COLUMN].to_numpy()[test], model.predict_proba(X)[:, 1])
+    result = metrics.result()
+    result['train_rows'] = rows
+    result['seconds'] = time.perf_counter() - start
+    return model, stats.to_scaler(), label_encoders, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the churn model out of core")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--data', help="CSV with the HR_comma_sep.csv columns")
+    source.add_argument('--db', help="SQLite database holding the table to train on")
+    parser.add_argument('--table', default=DB_TABLE)
+    parser.add_argument('--output-dir', default=SGD_OUTPUT_DIR,
+                        help="Where the artifacts are written (default: %(default)s, "
+                             "not the deployed files)")
+    parser.add_argument('--chunk-size', type=int, default=SGD_CHUNK_SIZE)
+    parser.add_argument('--epochs', type=int, default=SGD_EPOCHS)
+    parser.add_argument('--alpha', type=float, default=SGD_ALPHA, help="L2 regularization strength")
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    data_file = args.data or (None if args.db else DATA_FILE)
+    model, scaler, label_encoders, metrics = train_out_of_core(
+        lambda: iter_chunks(data_file, args.db, args.table, args.chunk_size),
+        args.epochs, args.alpha, args.test_size, args.seed)
+    write_artifacts(model, scaler, label_encoders, args.output_dir)
+    print(f"✅ Trained on {metrics['train_rows']:,} rows in {metrics['seconds']:.1f}s; "
+          f"test accuracy {metrics['accuracy']:.3f}, ROC-AUC {metrics['roc_auc']:.3f}, "
+          f"log loss {metrics['log_loss']:.3f} ({metrics['rows']:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Gradient-boosted tree model for Employee Churn Prediction
+
+Captures the non-linear clusters the logistic model cannot, such as
+leavers with low satisfaction but high evaluations. Training uses
+scikit-learn's GradientBoostingClassifier on the cached encode and split
+stages from train.py. Serving flattens every tree into a handful of
+contiguous arrays, one slot per node across the whole ensemble:
+
+    feature    int32    feature tested at the node (0 at leaves)
+    threshold  float64  go left when x <= threshold
+    left/right int32    child node; a leaf points to itself on both sides
+    value      float64  node output with the learning rate applied
+    roots      int32    root node of each tree
+    base       float64  prior log-odds of leaving
+
+TreeEnsemblePlan recompiles these into perfect binary trees in heap order
+and walks all trees for a block of rows one level at a time: max_depth
+gather/compare steps over a (trees, rows) array of node positions, with
+no Python loop over rows or trees. It has the ScoringPlan
+interface and is stored in the model bundle as model_type
+'gradient_boosting', so load_plan() and load_models() serve it unchanged.
+
+Usage:
+    python tree_model.py                             # train and write TREE_BUNDLE_FILE
+    python tree_model.py --n-estimators 200 --max-depth 4
+    python tree_model.py --output churn_model.npz    # deploy in place of the logistic model
+"""
+
+import argparse
+import hashlib
+import math
+
+import numpy as np
+
+from config import (DATA_FILE, TRAIN_CACHE_DIR, TREE_BUNDLE_FILE, TREE_BLOCK_ROWS,
+                    TREE_MAX_DEPTH, TREE_PARAMS, FEATURE_COLUMNS, CATEGORICAL_COLUMNS,
+                    CATEGORY_FALLBACKS)
+from scoring import compile_category_tables, encode_features, sigmoid
+
+TREE_ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'base')
+
+
+def validate_tree_arrays(arrays, n_features):
+    """Raise ValueError unless the arrays describe well-formed trees"""
+    missing = [name for name in TREE_ARRAYS if name not in arrays]
+    if missing:
+        raise ValueError(f"Tree bundle is missing arrays {missing}")
+    n_nodes = len(arrays['value'])
+    for name in ('feature', 'threshold', 'left', 'right'):
+        if arrays[name].shape != (n_nodes,):
+            raise ValueError(f"Tree array '{name}' has shape {arrays[name].shape}")
+    if arrays['base'].shape != (1,) or not len(arrays['roots']):
+        raise ValueError("Tree bundle needs one base value and at least one tree")
+    if not all(np.isfinite(arrays[name]).all() for name in ('threshold', 'value', 'base')):
+        raise ValueError("Tree bundle holds non-finite values")
+    if ((arrays['feature'] < 0) | (arrays['feature'] >= n_features)).any():
+        raise ValueError("Tree bundle tests a feature outside the schema")
+    if ((arrays['roots'] < 0) | (arrays['roots'] >= n_nodes)).any():
+        raise ValueError("Tree bundle root index out of range")
+
+    # Children always come after their parent, so every walk ends at a leaf
+    nodes = np.arange(n_nodes)
+    left, right = arrays['left'], arrays['right']
+    leaf = (left == nodes) & (right == nodes)
+    internal_ok = (left > nodes) & (right > nodes) & (left < n_nodes) & (right < n_nodes)
+    if not (leaf | internal_ok).all():
+        raise ValueError("Tree bundle child indices do not form trees")
+
+
+def _tree_depth(left, right, roots):
+    depth, frontier = 0, np.asarray(roots)
+    while True:
+        internal = frontier[left[frontier] != frontier]
+        if not len(internal):
+            return depth
+        frontier = np.concatenate((left[internal], right[internal]))
+        depth += 1
+
+
+class TreeEnsemblePlan:
+    """Boosted trees flattened into arrays and scored level by level
+
+    Same interface as ScoringPlan: predict_proba() on an encoded float
+    matrix, score() on raw columns and score_one() on one raw row.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, base, category_tables):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.base = float(base)
+        self.category_tables = category_tables
+        self.max_depth = _tree_depth(self.left, self.right, self.roots)
+        if self.max_depth > TREE_MAX_DEPTH:
+            raise ValueError(f"Trees deeper than {TREE_MAX_DEPTH} levels are not supported")
+        self._compile_dense()
+        # Log-odds before any split: row sums of contributions() are measured from here
+        self.expected_value = self.base + float(self.value[self.roots].sum())
+        self._lists = tuple(a.tolist() for a in (self.feature, self.threshold, self.left,
+                                                  self.right, self.value, self.roots))
+        self.version = self._fingerprint()
+        # Set by model_bundle.load_bundle for plans loaded from a bundle
+        self.schema = None
+        self.content_hash = None
+
+    def _fingerprint(self):
+        digest = hashlib.sha256()
+        for array in self.to_arrays().values():
+            digest.update(array.tobytes())
+        for col in sorted(self.category_tables):
+            for category in self.category_tables[col].classes:
+                digest.update(f"{col}={category};".encode())
+        return digest.hexdigest()[:12]
+
+    @classmethod
+    def from_model(cls, model, label_encoders, fallbacks=CATEGORY_FALLBACKS):
+        """Flatten a fitted binary GradientBoostingClassifier"""
+        if not hasattr(model, 'estimators_') or model.estimators_.shape[1] != 1:
+            raise ValueError("Tree plans need a binary GradientBoostingClassifier")
+        if model.init_ == 'zero':
+            base = 0.0
+        else:
+            prior = model.init_.class_prior_[1]
+            base = math.log(prior / (1 - prior))
+
+        parts, offset = [], 0
+        for estimator in model.estimators_[:, 0]:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            parts.append((np.where(leaf, 0, tree.feature),
+                          np.where(leaf, 0.0, tree.threshold),
+                          np.where(leaf, nodes, tree.children_left) + offset,
+                          np.where(leaf, nodes, tree.children_right) + offset,
+                          tree.value[:, 0, 0] * model.learning_rate))
+            offset += tree.node_count
+        feature, threshold, left, right, value = (np.concatenate(a) for a in zip(*parts))
+        roots = np.cumsum([0] + [len(p[0]) for p in parts[:-1]])
+        return cls(feature, threshold, left, right, value, roots, base,
+                   compile_category_tables(label_encoders, fallbacks))
+
+    @classmethod
+    def from_arrays(cls, arrays, category_tables):
+        """Rebuild a plan from to_arrays() output"""
+        return cls(*(arrays[name] for name in TREE_ARRAYS[:-1]), float(arrays['base'][0]),
+                   category_tables)
+
+    def to_arrays(self):
+        """Return the flattened ensemble as {name: array} for a model bundle"""
+        return {'feature': self.feature, 'threshold': self.threshold, 'left': self.left,
+                'right': self.right, 'value': self.value, 'roots': self.roots,
+                'base': np.array([self.base])}
+
+    def _compile_dense(self):
+        """Lay every tree out as a perfect binary tree of depth max_depth
+
+        Heap order puts the children of position i at 2i+1 and 2i+2, so the
+        walk needs no child-index lookups. A leaf above the last level
+        points to itself on both sides, so it fills its whole subtree with
+        copies of itself; its +inf threshold always sends rows left.
+        Thresholds are rounded down to float32, which keeps x <= threshold
+        exact for the float32 inputs scikit-learn's trees compare.
+        """
+        n_trees, n_slots = len(self.roots), 2 ** (self.max_depth + 1) - 1
+        feature = np.zeros((n_trees, n_slots), dtype=np.intp)
+        threshold = np.full((n_trees, n_slots), np.inf, dtype=np.float32)
+        value = np.zeros((n_trees, n_slots), dtype=np.float64)
+        nodes = self.roots[:, None].astype(np.intp)
+        for depth in range(self.max_depth + 1):
+            slots = slice(2 ** depth - 1, 2 ** (depth + 1) - 1)
+            leaf = self.left[nodes] == nodes
+            value[:, slots] = self.value[nodes]
+            feature[:, slots] = np.where(leaf, 0, self.feature[nodes])
+            rounded = self.threshold[nodes].astype(np.float32)
+            rounded = np.where(rounded > self.threshold[nodes],
+                               np.nextafter(rounded, np.float32(-np.inf)), rounded)
+            threshold[:, slots] = np.where(leaf, np.inf, rounded)
+            nodes = np.stack((self.left[nodes], self.right[nodes]), axis=-1).reshape(n_trees, -1)
+        self._dense = (feature.ravel(), threshold.ravel(), value.ravel(),
+                       (np.arange(n_trees) * n_slots)[:, None])
+
+    def _walk(self, X, contributions=None):
+        """Return each tree's leaf slot for a block of rows, shape (trees, rows)
+
+        Rows are columns here: one (trees, rows) array of heap positions
+        steps down a level per iteration. With a contributions array, each
+        split's change in node value is added to the feature it tested.
+        """
+        feature, threshold, value, tree_offsets = self._dense
+        XT = np.ascontiguousarray(np.asarray(X, dtype=np.float32).T)
+        n_rows = XT.shape[1]
+        flat, columns = XT.ravel(), np.arange(n_rows)
+        nodes = np.broadcast_to(tree_offsets, (len(tree_offsets), n_rows))
+        for depth in range(self.max_depth):
+            if depth == 0:
+                # Every row starts at the root, so the root tests read whole
+                # feature rows of XT instead of gathering element by element
+                tested = feature[tree_offsets]
+                go_left = XT[tested[:, 0]] <= threshold[tree_offsets]
+            else:
+                tested = np.take(feature, nodes)
+                go_left = np.take(flat, tested * n_rows + columns) <= np.take(threshold, nodes)
+            # Heap order: the children of slot i are 2i+1 and 2i+2
+            children = 2 * nodes - tree_offsets + 2 - go_left
+            if contributions is not None:
+                delta = np.take(value, children) - np.take(value, nodes)
+                for f in range(XT.shape[0]):
+                    contributions[:, f] += np.where(tested == f, delta, 0.0).sum(axis=0)
+            nodes = children
+        return nodes
+
+    def decision_function(self, X):
+        """Return the log-odds of leaving for an encoded feature matrix"""
+        X = np.asarray(X)
+        value = self._dense[2]
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), TREE_BLOCK_ROWS):
+            block = X[start:start + TREE_BLOCK_ROWS]
+            out[start:start + len(block)] = np.take(value, self._walk(block)).sum(axis=0)
+        return out + self.base
+
+    def contributions(self, X):
+        """Return each feature's share of the log-odds along the decision paths
+
+        Row sums plus expected_value give decision_function(X).
+        """
+        X = np.asarray(X)
+        out = np.zeros(X.shape, dtype=np.float64)
+        for start in range(0, len(X), TREE_BLOCK_ROWS):
+            self._walk(X[start:start + TREE_BLOCK_ROWS], out[start:start + TREE_BLOCK_ROWS])
+        return out
+
+    def predict_proba(self, X):
+        """Return an (n, 2) array of stay/leave probabilities"""
+        leave = sigmoid(self.decision_function(X))
+        return np.column_stack((1.0 - leave, leave))
+
+    def score(self, df):
+        """Encode raw HR_comma_sep.csv columns and score them"""
+        return self.predict_proba(encode_features(df, self.category_tables))
+
+    def score_one(self, row):
+        """Return the leave probability for one row of raw feature values
+
+        row is a sequence in FEATURE_COLUMNS order; the walk is plain
+        Python, which beats NumPy call overhead for a single row.
+        """
+        values = [self.category_tables[col].encode_one(value) if col in self.category_tables
+                  else value for col, value in zip(FEATURE_COLUMNS, row)]
+        x = np.asarray(values, dtype=np.float32).tolist()
+        feature, threshold, left, right, value, roots = self._lists
+        z = self.base
+        for node in roots:
+            while left[node] != node:
+                node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+            z += value[node]
+        return 0.5 * math.tanh(0.5 * z) + 0.5
+
+
+def train_trees(data_file=DATA_FILE, params=None, test_size=0.2, random_state=42,
+                cache_dir=TRAIN_CACHE_DIR, log=print):
+    """Fit boosted trees on the train.py encode and split stages
+
+    Returns (model, label_encoders, metrics); the fit is cached like the
+    other stages, keyed by the data, split and parameters.
+    """
+    from sklearn.ensemble import GradientBoostingClassifier
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    from train import StageCache, build_stages, label_encoders_from, stage_key
+
+    params = {**TREE_PARAMS, **(params or {})}
+    cache = StageCache(cache_dir, log)
+    stages = build_stages(data_file, test_size, random_state, cache)
+    (encode_key, encode), (split_key, split) = stages['encode'], stages['split']
+
+    def fit():
+        X, y = encode()['X'], encode()['y']
+        train_rows, test_rows = split()
+        model = GradientBoostingClassifier(random_state=random_state, **params)
+        model.fit(X[train_rows], y[train_rows])
+        leave = model.predict_proba(X[test_rows])[:, 1]
+        metrics = {'accuracy': float(accuracy_score(y[test_rows], leave >= 0.5)),
+                   'roc_auc': float(roc_auc_score(y[test_rows], leave))}
+        return model, metrics
+
+    trees_key = stage_key('trees', encode_key, split_key, params, random_state)
+    model, metrics = cache.run('trees', trees_key, fit)
+    return model, label_encoders_from(encode()['vocabularies']), metrics
+
+
+def export_tree_bundle(model, label_encoders, path=TREE_BUNDLE_FILE,
+                       fallbacks=CATEGORY_FALLBACKS):
+    """Write a fitted GradientBoostingClassifier as a model bundle"""
+    from model_bundle import build_manifest, save_bundle
+
+    plan = TreeEnsemblePlan.from_model(model, label_encoders, fallbacks)
+    manifest = build_manifest({col: [str(c) for c in label_encoders[col].classes_]
+                               for col in CATEGORICAL_COLUMNS},
+                              fallbacks, model_type='gradient_boosting')
+    manifest.update(n_trees=len(plan.roots), max_depth=plan.max_depth)
+    return save_bundle(manifest, plan.to_arrays(), path)
+
+
+def main():
+    from model_bundle import load_bundle
+
+    parser = argparse.ArgumentParser(description="Train and export the boosted tree model")
+    parser.add_argument('--data', default=DATA_FILE, help="CSV with the HR_comma_sep.csv columns")
+    parser.add_argument('--output', default=TREE_BUNDLE_FILE)
+    parser.add_argument('--cache-dir', default=TRAIN_CACHE_DIR)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-estimators', type=int, default=TREE_PARAMS['n_estimators'])
+    parser.add_argument('--learning-rate', type=float, default=TREE_PARAMS['learning_rate'])
+    parser.add_argument('--max-depth', type=int, default=TREE_PARAMS['max_depth'])
+    args = parser.parse_args()
+
+    params = {'n_estimators': args.n_estimators, 'learning_rate': args.learning_rate,
+              'max_depth': args.max_depth}
+    model, label_encoders, metrics = train_trees(args.data, params, random_state=args.seed,
+                                                 cache_dir=args.cache_dir)
+    path = export_tree_bundle(model, label_encoders, args.output)
+    plan = load_bundle(path)
+    print(f"✅ {len(plan.roots)} trees written to {path} (version {plan.version}): "
+          f"test accuracy {metrics['accuracy']:.3f}, ROC-AUC {metrics['roc_auc']:.3f}")
+
+
+if __name__ == "__main__":
+    main()